@@ -9,12 +9,17 @@ interface Project {
     title: string;
     thumbnailUrl: string | null;
     lastEdited: string;
-    createdAt: string;
 }
 
+// Only the columns the project cards render
+const LIST_FIELDS = 'id,title,thumbnailUrl,lastEdited';
+const PAGE_SIZE = 100;
+
 export function Dashboard() {
     const [projects, setProjects] = useState<Project[]>([]);
     const [isLoading, setIsLoading] = useState(true);
+    const [isLoadingMore, setIsLoadingMore] = useState(false);
+    const [nextCursor, setNextCursor] = useState<string | null>(null);
     const [error, setError] = useState<string | null>(null);
     const router = useRouter();
 
@@ -22,11 +27,16 @@ export function Dashboard() {
         fetchProjects();
     }, []);
 
-    const fetchProjects = async () => {
+    const fetchProjects = async (cursor: string | null = null) => {
+        const setLoading = cursor ? setIsLoadingMore : setIsLoading;
         try {
-            setIsLoading(true);
+            setLoading(true);
             setError(null);
-            const response = await fetch('http://127.0.0.1:8000/api/projects', {
+            const params = new URLSearchParams({ limit: String(PAGE_SIZE), fields: LIST_FIELDS });
+            if (cursor) {
+                params.set('cursor', cursor);
+            }
+            const response = await fetch(`http://127.0.0.1:8000/api/projects?${params}`, {
                 method: 'GET',
                 headers: {
                     'Content-Type': 'application/json',
@@ -39,7 +49,9 @@ export function Dashboard() {
             }
 
             const data = await response.json();
-            setProjects(data.projects || []);
+            const page: Project[] = data.projects || [];
+            setProjects((previous) => (cursor ? [...previous, ...page] : page));
+            setNextCursor(data.nextCursor || null);
         } catch (err) {
             console.error('Error fetching projects:', err);
             if (err instanceof TypeError && err.message.includes('fetch')) {
@@ -48,7 +60,7 @@ export function Dashboard() {
                 setError(err instanceof Error ? err.message : 'Failed to load projects');
             }
         } finally {
-            setIsLoading(false);
+            setLoading(false);
         }
     };
 
@@ -173,7 +185,7 @@ export function Dashboard() {
                     )}
 
                     {/* Projects Grid */}
-                    {!isLoading && !error && projects.length > 0 && (
+                    {!isLoading && projects.length > 0 && (
                         <div className="grid grid-cols-1 sm:grid-cols-2 lg:grid-cols-3 xl:grid-cols-4 gap-4 sm:gap-6">
                             {projects.map((project) => (
                                 <div
@@ -221,6 +233,19 @@ export function Dashboard() {
                             ))}
                         </div>
                     )}
+
+                    {/* Load More */}
+                    {!isLoading && nextCursor && (
+                        <div className="flex justify-center mt-8">
+                            <button
+                                onClick={() => fetchProjects(nextCursor)}
+                                disabled={isLoadingMore}
+                                className="px-6 py-2 bg-[#262626] text-[#fafafa] text-sm rounded-lg border border-[rgba(38,38,38,0.4)] hover:border-[rgba(142,81,255,0.4)] transition-all disabled:opacity-50"
+                            >
+                                {isLoadingMore ? 'Loading...' : 'Load more projects'}
+                            </button>
+                        </div>
+                    )}
                 </div>
             </main>
         </div>
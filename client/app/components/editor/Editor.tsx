@@ -10,6 +10,7 @@ interface Project {
     description: string;
     thumbnailUrl: string | null;
     videoUrl: string | null;
+    videoVariants?: Record<string, string>;
     createdAt: string;
     lastEdited: string;
     audioFile: {
@@ -20,6 +21,16 @@ interface Project {
     referenceImages: Array<{
         filename: string;
         path: string;
+        width?: number;
+        height?: number;
+        sha256?: string;
+        derived?: Record<string, {
+            filename: string;
+            path: string;
+            width: number;
+            height: number;
+            url: string;
+        }>;
     }>;
     storyboard: Record<string, any>;
     agentHistory: any[];
@@ -195,7 +206,16 @@ export function Editor({ projectId }: EditorProps) {
                                             </label>
                                             <div className="flex flex-wrap gap-2">
                                                 {project.referenceImages.map((img, index) => (
-                                                    <div key={index} className="text-[#fafafa] text-xs bg-[rgba(38,38,38,0.5)] px-2 py-1 rounded">
+                                                    <div key={index} className="flex items-center gap-2 text-[#fafafa] text-xs bg-[rgba(38,38,38,0.5)] px-2 py-1 rounded">
+                                                        {img.derived?.thumbnail && (
+                                                            <img
+                                                                src={`http://127.0.0.1:8000${img.derived.thumbnail.url}`}
+                                                                alt={img.filename}
+                                                                width={img.derived.thumbnail.width}
+                                                                height={img.derived.thumbnail.height}
+                                                                className="h-8 w-auto rounded"
+                                                            />
+                                                        )}
                                                         {img.filename}
                                                     </div>
                                                 ))}
@@ -207,7 +227,24 @@ export function Editor({ projectId }: EditorProps) {
                                     <div>
                                         <label className="text-[#a1a1a1] text-xs uppercase tracking-wide mb-1 block">Video Status</label>
                                         {project.videoUrl ? (
-                                            <p className="text-green-400 text-sm">Video generated</p>
+                                            <>
+                                                <p className="text-green-400 text-sm">Video generated</p>
+                                                {project.videoVariants && Object.keys(project.videoVariants).length > 0 && (
+                                                    <div className="flex flex-wrap gap-2 mt-2">
+                                                        {Object.entries(project.videoVariants).map(([profile, url]) => (
+                                                            <a
+                                                                key={profile}
+                                                                href={`http://127.0.0.1:8000${url}`}
+                                                                target="_blank"
+                                                                rel="noopener noreferrer"
+                                                                className="text-[#fafafa] text-xs bg-[rgba(38,38,38,0.5)] hover:bg-[#262626] px-2 py-1 rounded capitalize"
+                                                            >
+                                                                {profile}
+                                                            </a>
+                                                        ))}
+                                                    </div>
+                                                )}
+                                            </>
                                         ) : (
                                             <p className="text-[#a1a1a1] text-sm">Video pending generation</p>
                                         )}
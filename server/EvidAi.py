@@ -1,28 +1,234 @@
-import whisper
 import json
 import os
-import json
-import jsonKeywordExtractor as jke
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import metrics
+from transcriptCache import TranscriptCache, DEFAULT_MAX_BYTES, cacheKey, fileSha256
+
+# Whisper model size: 'tiny', 'base', 'small', 'medium' or 'large'
+DEFAULT_MODEL = os.getenv("WHISPER_MODEL", "base")
+
+# Chunked transcription settings
+SAMPLE_RATE = 16000  # Whisper always works on 16kHz mono
+CHUNK_SECONDS = 300
+OVERLAP_SECONDS = 2.0
+SILENCE_SEARCH_SECONDS = 15
+TRANSCRIBE_WORKERS = int(os.getenv("TRANSCRIBE_WORKERS", str(os.cpu_count() or 1)))
+
+# Finished transcripts keyed by audio digest, model and options
+transcript_cache = TranscriptCache(
+    "Output/transcripts/",
+    max_bytes=int(os.getenv("TRANSCRIPT_CACHE_MAX_BYTES", str(DEFAULT_MAX_BYTES))),
+)
+
+# Models loaded by this process, kept resident between transcriptions
+_models = {}
+
+# Persistent pool so chunk workers keep their models resident too
+_chunk_pool = None
+
+
+def loadModel(model_name=DEFAULT_MODEL):
+    """Load a Whisper model on first use and reuse it for the life of the process."""
+    model = _models.get(model_name)
+    if model is None:
+        import whisper
+
+        print(f"Loading Whisper model '{model_name}'...")
+        model = whisper.load_model(model_name)
+        _models[model_name] = model
+    return model
+
+
+def transcribe(audio_file, model_name=DEFAULT_MODEL, **options):
+    """
+    Transcribe audio_file and return Whisper's result dict in memory.
+    The result can be passed straight to jsonKeywordExtractor.extractKeywords.
+    """
+    options.setdefault("fp16", False)
+    result = loadModel(model_name).transcribe(audio_file, **options)
+    return {
+        "text": result["text"],
+        "language": result.get("language"),
+        "segments": [slimSegment(segment) for segment in result["segments"]],
+    }
+
+
+def slimSegment(segment, offset=0.0):
+    return {
+        "id": segment["id"],
+        "start": segment["start"] + offset,
+        "end": segment["end"] + offset,
+        "text": segment["text"],
+    }
+
+
+# -------------------------
+# Chunked Parallel Transcription
+# -------------------------
+def findSilenceCuts(audio, chunk_seconds=CHUNK_SECONDS):
+    """
+    Return cut times (seconds) roughly every chunk_seconds, each placed at the
+    quietest stretch within SILENCE_SEARCH_SECONDS of the target.
+    """
+    frame = int(SAMPLE_RATE * 0.03)
+    n_frames = len(audio) // frame
+    if n_frames == 0:
+        return []
+
+    frames = audio[: n_frames * frame].reshape(n_frames, frame)
+    energy = np.sqrt(np.mean(frames**2, axis=1))
+    # Smooth over ~0.3s so a cut lands in a pause, not a gap inside a word
+    energy = np.convolve(energy, np.ones(10) / 10, mode="same")
+
+    frame_seconds = frame / SAMPLE_RATE
+    total = len(audio) / SAMPLE_RATE
+    cuts = []
+    target = chunk_seconds
+    while target + SILENCE_SEARCH_SECONDS < total - chunk_seconds * 0.25:
+        lo = int((target - SILENCE_SEARCH_SECONDS) / frame_seconds)
+        hi = int((target + SILENCE_SEARCH_SECONDS) / frame_seconds)
+        cut = (lo + int(np.argmin(energy[lo:hi]))) * frame_seconds
+        cuts.append(cut)
+        target = cut + chunk_seconds
+    return cuts
+
+
+def _initChunkWorker(threads):
+    import torch
+
+    torch.set_num_threads(threads)
+
+
+def _transcribeChunk(job):
+    """Process pool entry point: transcribe one chunk of decoded samples."""
+    samples, model_name, options = job
+    result = loadModel(model_name).transcribe(samples, **options)
+    return result["segments"], result.get("language")
+
+
+def getChunkPool(workers=TRANSCRIBE_WORKERS):
+    global _chunk_pool
+    if _chunk_pool is None:
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        _chunk_pool = ProcessPoolExecutor(
+            max_workers=workers, initializer=_initChunkWorker, initargs=(threads,)
+        )
+    return _chunk_pool
+
+
+def mergeChunkSegments(chunk_results, bounds):
+    """
+    Shift each chunk's segments to global time and stitch them together so
+    text heard twice in an overlap is emitted once. Each chunk hands over at
+    its own end: it keeps segments whose midpoint falls before own_end, and
+    the next chunk picks up after the end of the last segment kept so far.
+    Chunks time the same words differently, so the hand-off follows what
+    was actually kept rather than the fixed cut.
+    """
+    merged = []
+    cutoff = 0.0
+    for (offset, _, own_end), segments in zip(bounds, chunk_results):
+        for segment in segments:
+            shifted = slimSegment(segment, offset)
+            midpoint = (shifted["start"] + shifted["end"]) / 2
+            if not cutoff <= midpoint < own_end:
+                continue
+
+            # Same words decoded on both sides of a cut
+            if merged and merged[-1]["text"].strip() == shifted["text"].strip():
+                if shifted["start"] < merged[-1]["end"]:
+                    continue
+
+            if merged:
+                start = max(shifted["start"], merged[-1]["end"])
+                shifted["start"] = min(start, shifted["end"])
+            shifted["id"] = len(merged)
+            merged.append(shifted)
+        if merged:
+            cutoff = merged[-1]["end"]
+    return merged
+
+
+def transcribeChunked(audio_file, model_name=DEFAULT_MODEL, **options):
+    """
+    Transcribe long audio by splitting it at silences into overlapping
+    chunks that run across the chunk pool. Short audio is transcribed in one
+    call. Returns the same shape as transcribe().
+    """
+    import whisper
+
+    options.setdefault("fp16", False)
+    audio = whisper.load_audio(audio_file)
+    cuts = findSilenceCuts(audio)
+    if not cuts:
+        return transcribe(audio, model_name, **options)
+
+    total = len(audio) / SAMPLE_RATE
+    edges = [0.0, *cuts, total]
+    jobs = []
+    bounds = []
+    for own_start, own_end in zip(edges, edges[1:]):
+        start = max(0.0, own_start - OVERLAP_SECONDS)
+        end = min(total, own_end + OVERLAP_SECONDS)
+        samples = audio[int(start * SAMPLE_RATE) : int(end * SAMPLE_RATE)]
+        jobs.append((samples, model_name, options))
+        bounds.append((start, own_start, own_end))
+
+    print(f"Transcribing {len(jobs)} chunks in parallel...")
+    chunk_results = list(getChunkPool().map(_transcribeChunk, jobs))
+    segments = mergeChunkSegments([result[0] for result in chunk_results], bounds)
+    return {
+        "text": "".join(segment["text"] for segment in segments),
+        "language": options.get("language") or chunk_results[0][1],
+        "segments": segments,
+    }
+
+
+# -------------------------
+# Cached Transcription
+# -------------------------
+def transcribeCached(audio_file, model_name=DEFAULT_MODEL, **options):
+    """
+    Return the transcript for audio_file from the cache when the same bytes
+    were already transcribed with this model and options; otherwise
+    transcribe (chunked for long audio) and store the result.
+    """
+    options.setdefault("fp16", False)
+    key = cacheKey(fileSha256(audio_file), model_name, options)
+
+    result = transcript_cache.get(key)
+    metrics.cache_result("transcript", result is not None)
+    if result is not None:
+        print(f"Transcript found in cache for {audio_file}")
+        # No span ran, so publish the hit from this worker ourselves
+        metrics.publish()
+        return result
+
+    with metrics.span("transcribe"):
+        result = transcribeChunked(audio_file, model_name, **options)
+    transcript_cache.put(key, result)
+    return result
 
 
-# Load Whisper model (using 'base' model - you can change to 'tiny', 'small', 'medium', or 'large' for better accuracy)
-model = whisper.load_model("base")
+if __name__ == "__main__":
+    import jsonKeywordExtractor as jke
 
-# Path to the audio file
-audio_file = os.path.join("Input", "Mid.mp3")
+    # Path to the audio file
+    audio_file = os.path.join("Input", "Mid.mp3")
 
-print("Transcribing audio file...")
-result = model.transcribe(audio_file, fp16=False)
+    # Create Output directory if it doesn't exist
+    output_dir = "Output"
+    os.makedirs(output_dir, exist_ok=True)
 
-with open("Output/output.json", "w", encoding="utf-8") as f:
-    json.dump(result, f, indent=2, ensure_ascii=False)
+    print("Transcribing audio file...")
+    result = transcribeCached(audio_file)
 
-# Create Output directory if it doesn't exist
-output_dir = "Output"
-os.makedirs(output_dir, exist_ok=True)
+    with open(output_dir + "/output.json", "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
 
-# Extract keywords from the audio file
-print("Saving keywords to file...")
-jke.saveKeywordsToFile(output_dir + "/output.json", output_dir + "/outputKWE.json")
+    # Extract keywords from the audio file
+    print("Saving keywords to file...")
+    jke.saveKeywordsToFile(output_dir + "/output.json", output_dir + "/outputKWE.json")
 
-## Generate Video based on keywords
+    ## Generate Video based on keywords
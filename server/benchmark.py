@@ -0,0 +1,410 @@
+"""
+Offline benchmark for the audio -> video pipeline.
+
+Generates synthetic narration audio and a transcript, serves photos (and,
+with --llm-topics, Gemini topics) from local stand-ins for the real APIs, and
+times each stage (wall, CPU, peak RSS, frames/sec). Results are written as
+JSON for regression tracking.
+
+    python benchmark.py --seconds 120 --segments 40 --repeat 2 --output bench.json
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SERVER_DIR = os.path.dirname(os.path.abspath(__file__))
+
+WORDS = (
+    "ocean mountain river forest city market coffee engine rocket garden "
+    "history science music travel winter summer football island bridge "
+    "desert planet camera kitchen library doctor teacher harvest festival"
+).split()
+
+
+# -------------------------
+# Stand-in Pexels API
+# -------------------------
+def makePhotoBytes(photo_id, size):
+    from PIL import Image
+
+    rng = random.Random(photo_id)
+    color = tuple(rng.randrange(256) for _ in range(3))
+    image = Image.new("RGB", size, color)
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def standInTopics(body):
+    """Answer a Gemini generateContent request with each segment's first words."""
+    prompt = body["contents"][0]["parts"][0]["text"]
+    segments = json.loads(prompt[prompt.index("[") :])
+    topics = [
+        {"id": segment["id"], "topic": " ".join(segment["text"].split()[:2])}
+        for segment in segments
+    ]
+    return {
+        "candidates": [
+            {
+                "content": {"role": "model", "parts": [{"text": json.dumps(topics)}]},
+                "finishReason": "STOP",
+            }
+        ]
+    }
+
+
+def startStandInServer(photo_size, latency):
+    """
+    Serve /search and /photos/<id>.jpg shaped like the Pexels API, plus a
+    Gemini generateContent endpoint for topic generation.
+    """
+    photos = {}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            time.sleep(latency)
+            if self.path.startswith("/search"):
+                query = self.path.split("query=", 1)[-1].split("&", 1)[0]
+                photo_id = zlib.crc32(query.encode("utf-8")) % 1_000_000
+                host = f"http://127.0.0.1:{self.server.server_port}"
+                body = json.dumps(
+                    {
+                        "photos": [
+                            {
+                                "id": photo_id,
+                                "src": {"original": f"{host}/photos/{photo_id}.jpg"},
+                            }
+                        ]
+                    }
+                ).encode("utf-8")
+                content_type = "application/json"
+            elif self.path.startswith("/photos/"):
+                photo_id = int(os.path.basename(self.path).split(".")[0])
+                with lock:
+                    if photo_id not in photos:
+                        photos[photo_id] = makePhotoBytes(photo_id, photo_size)
+                body = photos[photo_id]
+                content_type = "image/jpeg"
+            else:
+                self.send_error(404)
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            time.sleep(latency)
+            if ":generateContent" not in self.path:
+                self.send_error(404)
+                return
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length))
+            body = json.dumps(standInTopics(request)).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# -------------------------
+# Synthetic Inputs
+# -------------------------
+def makeAudio(path, seconds):
+    from moviepy.config import FFMPEG_BINARY
+
+    subprocess.run(
+        [
+            FFMPEG_BINARY,
+            "-y",
+            "-loglevel",
+            "error",
+            "-f",
+            "lavfi",
+            "-i",
+            f"sine=frequency=220:duration={seconds}",
+            "-ac",
+            "1",
+            path,
+        ],
+        check=True,
+    )
+
+
+def makeTranscript(seconds, n_segments, n_topics, seed=0):
+    rng = random.Random(seed)
+    topic_words = [rng.sample(WORDS, 3) for _ in range(n_topics)]
+    step = seconds / n_segments
+    segments = []
+    for i in range(n_segments):
+        words = topic_words[i % n_topics] * 2 + rng.sample(WORDS, 6)
+        rng.shuffle(words)
+        segments.append(
+            {
+                "id": i,
+                "start": round(i * step, 3),
+                "end": round((i + 1) * step, 3),
+                "text": " " + " ".join(words) + ".",
+            }
+        )
+    return {"text": "".join(s["text"] for s in segments), "segments": segments}
+
+
+# -------------------------
+# Measurement
+# -------------------------
+def cpuSeconds():
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+def peakRssMb():
+    """Lifetime peak; only a fallback where /proc is unavailable."""
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return max(own, children) / 1024  # ru_maxrss is KiB on Linux
+
+
+def treeRssKb():
+    """Resident memory of this process and all its descendants, from /proc."""
+    total = 0
+    pids = [os.getpid()]
+    while pids:
+        pid = pids.pop()
+        try:
+            with open(f"/proc/{pid}/status", "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1])
+                        break
+            for task in os.listdir(f"/proc/{pid}/task"):
+                with open(f"/proc/{pid}/task/{task}/children", "r") as f:
+                    pids.extend(int(child) for child in f.read().split())
+        except (OSError, ValueError):
+            continue  # exited while we were reading it
+    return total
+
+
+class RssSampler:
+    """Track the process tree's peak RSS over one stage from a background thread."""
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak_kb = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while True:
+            self.peak_kb = max(self.peak_kb, treeRssKb())
+            if self._stop.wait(self.interval):
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak_kb = max(self.peak_kb, treeRssKb())
+
+    def peakMb(self):
+        return self.peak_kb / 1024 if self.peak_kb else peakRssMb()
+
+
+def timeStage(results, name, fn, *args, **kwargs):
+    wall_start = time.perf_counter()
+    cpu_start = cpuSeconds()
+    with RssSampler() as rss:
+        value = fn(*args, **kwargs)
+    results[name] = {
+        "wall_s": round(time.perf_counter() - wall_start, 4),
+        "cpu_s": round(cpuSeconds() - cpu_start, 4),
+        "peak_rss_mb": round(rss.peakMb(), 1),
+    }
+    print(f"  {name}: {results[name]}")
+    return value
+
+
+# -------------------------
+# Pipeline Run
+# -------------------------
+def runOnce(args, audio_path):
+    import jsonKeywordExtractor as jke
+    import createVideo
+    from pexelsImageGen import prefetchPhotos
+
+    stages = {}
+    transcript = makeTranscript(args.seconds, args.segments, args.topics)
+
+    if args.transcribe:
+        import EvidAi
+
+        transcript = timeStage(
+            stages, "transcribe", EvidAi.transcribeCached, audio_path, args.model
+        )
+
+    if args.llm_topics:
+        import gemini
+
+        topicGenerator = gemini.generateTopics
+    else:
+        topicGenerator = jke.keywordsToTopics
+
+    segments = timeStage(
+        stages,
+        "keywords",
+        lambda: topicGenerator(jke.extractKeywords(transcript)),
+    )
+    photos = timeStage(stages, "photos", prefetchPhotos, segments)
+    for segment in segments:
+        segment["image_path"] = photos.get(segment["topic"])
+
+    size = tuple(args.size)
+    timeStage(
+        stages,
+        "bake",
+        lambda: [createVideo.bakeFrame(s["image_path"], size) for s in segments],
+    )
+
+    prefix = "preview" if args.draft else "result"
+    output_path = os.path.join("Output", f"{prefix}_benchmark.mp4")
+    if args.profiles:
+        # One ladder render instead of --size
+        render = createVideo.renderProfiles
+        target = createVideo.outputProfiles(args.profiles)
+    else:
+        render = createVideo.renderSegments
+        target = size
+    timeStage(
+        stages,
+        "render",
+        render,
+        audio_path,
+        segments,
+        target,
+        workers=args.workers,
+        output_path=output_path,
+        draft=args.draft,
+    )
+    if args.draft:
+        frames = args.seconds * createVideo.DRAFT_ENCODE_PARAMS["fps"]
+    else:
+        frames = args.seconds * createVideo.ENCODE_PARAMS["fps"]
+    frames *= len(args.profiles or [size])
+    stages["render"]["frames_per_s"] = round(frames / stages["render"]["wall_s"], 1)
+    return stages
+
+
+def gitCommit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=SERVER_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--seconds", type=float, default=60)
+    parser.add_argument("--segments", type=int, default=20)
+    parser.add_argument("--topics", type=int, default=8)
+    parser.add_argument("--size", type=int, nargs=2, default=[1080, 1920])
+    parser.add_argument("--photo-size", type=int, nargs=2, default=[4000, 3000])
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument(
+        "--draft", action="store_true", help="render low-resolution previews"
+    )
+    parser.add_argument(
+        "--profiles", nargs="+", default=None, help="render these output profiles"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=1, help="later runs hit warm caches"
+    )
+    parser.add_argument(
+        "--transcribe", action="store_true", help="needs a local Whisper model"
+    )
+    parser.add_argument("--model", default="tiny")
+    parser.add_argument(
+        "--llm-topics", action="store_true", help="generate topics via gemini.py"
+    )
+    parser.add_argument("--workdir", default=None)
+    parser.add_argument("--output", default=None, help="write JSON results here")
+    args = parser.parse_args()
+    output = os.path.abspath(args.output) if args.output else None
+
+    server = startStandInServer(tuple(args.photo_size), args.latency)
+    os.environ["PEXELS_API_URL"] = f"http://127.0.0.1:{server.server_port}"
+    os.environ.setdefault("PEXELS_API_KEY", "benchmark")
+    os.environ["GEMINI_BASE_URL"] = f"http://127.0.0.1:{server.server_port}"
+    os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+    # Caches use paths relative to the working directory; keep them isolated
+    workdir = args.workdir or tempfile.mkdtemp(prefix="evidai_bench_")
+    os.makedirs(os.path.join(workdir, "Output"), exist_ok=True)
+    os.chdir(workdir)
+    sys.path.insert(0, SERVER_DIR)
+
+    audio_path = os.path.join(workdir, "narration.mp3")
+    makeAudio(audio_path, args.seconds)
+
+    runs = []
+    for i in range(args.repeat):
+        print(f"Run {i + 1} of {args.repeat}")
+        runs.append(runOnce(args, audio_path))
+
+    server.shutdown()
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": gitCommit(),
+        "machine": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "config": vars(args),
+        "runs": runs,
+    }
+
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Benchmark results saved to {output}")
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
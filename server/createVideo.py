@@ -2,77 +2,289 @@ from moviepy import (
     VideoFileClip,
     AudioFileClip,
     CompositeAudioClip,
+    CompositeVideoClip,
     concatenate_videoclips,
     ImageClip,
 )
+from moviepy.config import FFMPEG_BINARY
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
 import json
+import os
+import re
+import subprocess
 from datetime import datetime
-from pexelsImageGen import getPhoto
+from pexelsImageGen import getPhoto, prefetchPhotos
+import metrics
+import scratchSpace
 from PIL import Image
 
+# Every intermediate file must be encoded with exactly these settings so the
+# final concat can copy the streams instead of encoding a second time.
+ENCODE_PARAMS = {
+    "codec": "libx264",
+    "preset": "ultrafast",
+    "fps": 30,
+    "audio_codec": "aac",
+    "audio_fps": 44100,
+    "audio_bitrate": "192k",
+    "ffmpeg_params": ["-pix_fmt", "yuv420p"],
+}
+
+# Editor previews only need to show image and timing alignment: a third of the
+# resolution, a third of the frame rate and a high CRF cost a fraction of a
+# full encode. Drafts are still uniform among themselves, so they concat too.
+DRAFT_SCALE = 3
+DRAFT_ENCODE_PARAMS = {
+    **ENCODE_PARAMS,
+    "fps": 10,
+    "audio_bitrate": "64k",
+    "ffmpeg_params": ["-pix_fmt", "yuv420p", "-crf", "32", "-tune", "stillimage"],
+}
+
+
+def draftSize(size):
+    """Reduced, even-sized canvas used for draft previews of a size render."""
+    return tuple(max(2, side // DRAFT_SCALE // 2 * 2) for side in size)
+
+
+# Output ladder: one render can produce several of these from the same
+# transcript, topics, photos and narration. size sets the aspect ratio and
+# resolution; bitrate (e.g. "6M") caps the video bitrate, None keeps x264's
+# constant quality. Drafts ignore bitrate and use DRAFT_ENCODE_PARAMS.
+OUTPUT_PROFILES = [
+    {"name": "vertical", "size": (1080, 1920), "bitrate": None},
+    {"name": "landscape", "size": (1920, 1080), "bitrate": None},
+    {"name": "square", "size": (1080, 1080), "bitrate": None},
+]
+
+
+def outputProfiles(names):
+    """Look up OUTPUT_PROFILES entries by name, in the order given."""
+    profiles = {profile["name"]: profile for profile in OUTPUT_PROFILES}
+    unknown = [name for name in names if name not in profiles]
+    if unknown:
+        raise ValueError(f"Unknown output profile(s): {', '.join(unknown)}")
+    return [profiles[name] for name in names]
+
+
+def profileParams(profile, draft=False):
+    """Encode params for a profile; parts of one profile all share them."""
+    params = DRAFT_ENCODE_PARAMS if draft else ENCODE_PARAMS
+    bitrate = profile.get("bitrate")
+    if draft or not bitrate:
+        return params
+    return {
+        **params,
+        "ffmpeg_params": [
+            *params["ffmpeg_params"],
+            "-b:v",
+            bitrate,
+            "-maxrate",
+            bitrate,
+            "-bufsize",
+            bitrate,
+        ],
+    }
+
+
+def defaultOutputPath(draft=False):
+    """Output/result_{date}.mp4, or Output/preview_{date}.mp4 for drafts."""
+    date = datetime.now().strftime("%Y%m%d%H%M%S")
+    prefix = "preview" if draft else "result"
+    return f"Output/{prefix}_{date}.mp4"
+
+
+def variantPath(output_path, name):
+    """Output path of a secondary profile next to the primary render."""
+    stem, ext = os.path.splitext(output_path)
+    return f"{stem}_{name}{ext}"
+
+
+def variantPaths(output_path, profiles):
+    """{profile name: path}: the first profile at output_path, the rest beside it."""
+    paths = {profiles[0]["name"]: output_path}
+    for profile in profiles[1:]:
+        paths[profile["name"]] = variantPath(output_path, profile["name"])
+    return paths
+
 
 # -------------------------
 # Video Concatenation
 # -------------------------
-def generateVideo(clips):
+def generateVideo(clips, draft=False, profile=None, output_path=None):
+    """
+    Write clips to output_path (Output/result_{date}.mp4 by default, preview_
+    for drafts). With a profile, every clip is fitted to the profile's size
+    and its bitrate is applied; the default path then gets the profile name
+    appended.
+    """
     if not clips:
         raise ValueError("clips list cannot be empty")
 
+    path = output_path or defaultOutputPath(draft)
+    size = None
+    if profile is not None:
+        size = profile["size"]
+
+    if draft:
+        # Intro/outro arrive at full size; shrink everything to the draft canvas
+        if size is None:
+            size = (max(clip.w for clip in clips), max(clip.h for clip in clips))
+        size = draftSize(size)
+        params = dict(DRAFT_ENCODE_PARAMS)
+        params["ffmpeg_params"] = [*params["ffmpeg_params"], "-movflags", "+faststart"]
+    else:
+        params = {
+            "codec": "libx264",
+            "preset": "ultrafast",
+            "fps": 30,
+            # moov atom up front so players can start and seek before the download ends
+            "ffmpeg_params": ["-movflags", "+faststart"],
+        }
+        if profile is not None and profile.get("bitrate"):
+            params["bitrate"] = profile["bitrate"]
+
+    if size is not None:
+        clips = [fitClip(clip, size) for clip in clips]
+    if profile is not None and output_path is None:
+        path = variantPath(path, profile["name"])
+
     combined = concatenate_videoclips(clips, method="compose")
-    date = datetime.now().strftime("%Y%m%d%H%M%S")
+    with scratchSpace.job_dir("video") as work_dir:
+        combined.write_videofile(
+            path, threads=8, temp_audiofile_path=work_dir, **params
+        )
 
-    combined.write_videofile(
-        f"Output/result_{date}.mp4",
-        codec="libx264",
-        preset="ultrafast",
-        threads=8,
-        fps=30,
-    )
+
+# -------------------------
+# Baked Frame Cache
+# -------------------------
+BAKED_DIR = "Output/baked/"
+SHA256_NAME = re.compile(r"^[0-9a-f]{64}$")
+
+
+_digest_memo = {}
+
+
+def fileDigest(path):
+    """sha256 of a file; photo cache files are already named by their digest."""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    if SHA256_NAME.match(stem):
+        return stem
+
+    # Narration and branding files are re-keyed on every render
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    if memo_key in _digest_memo:
+        return _digest_memo[memo_key]
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    _digest_memo[memo_key] = digest.hexdigest()
+    return _digest_memo[memo_key]
+
+
+def bakedPath(image_path, size, color=(0, 0, 0)):
+    color_hex = "".join(f"{c:02x}" for c in color)
+    baked_name = f"{fileDigest(image_path)}_{size[0]}x{size[1]}_{color_hex}.jpeg"
+    return os.path.join(BAKED_DIR, baked_name)
+
+
+def bakeFrame(image_path, size, color=(0, 0, 0), source=None):
+    """
+    Center image_path on a size background of color and return the JPEG path.
+    Results are cached by (source digest, size, color) under BAKED_DIR.
+    source optionally names an already baked frame of image_path to scale
+    down from instead of decoding the original photo.
+    """
+    baked_path = bakedPath(image_path, size, color)
+    cached = os.path.exists(baked_path)
+    metrics.cache_result("baked_frame", cached)
+    if cached:
+        # Keep recency current for scratchSpace.collect_garbage
+        os.utime(baked_path)
+        return baked_path
+
+    with metrics.span("bake"):
+        return _bakeFrame(source or image_path, size, color, baked_path)
+
+
+def _bakeFrame(image_path, size, color, baked_path):
+    # ---- Bake background + centered image using PIL ----
+    with Image.open(image_path) as source:
+        img_width, img_height = source.size
+        bg_width, bg_height = size
+
+        scale = min(bg_width / img_width, bg_height / img_height)
+        new_size = (int(img_width * scale), int(img_height * scale))
+
+        # Let the JPEG decoder downsample (1/2, 1/4, 1/8) before we resample
+        source.draft("RGB", new_size)
+        img = source.convert("RGB").resize(new_size, Image.LANCZOS)
+
+    # Create background
+    background = Image.new("RGB", size, color)
+
+    # Center position
+    x = (bg_width - new_size[0]) // 2
+    y = (bg_height - new_size[1]) // 2
+
+    background.paste(img, (x, y))
+
+    # Write then rename so concurrent render workers never read a partial file
+    os.makedirs(BAKED_DIR, exist_ok=True)
+    temp_path = f"{baked_path}.{os.getpid()}.tmp"
+    background.save(temp_path, "JPEG", quality=95)
+    os.replace(temp_path, baked_path)
+
+    return baked_path
 
 
 # -------------------------
 # Audio → Video Segment
 # -------------------------
+def segmentFrame(segment, size, color=(0, 0, 0), draft=False):
+    """Return the baked still for a segment at size (or its draft size)."""
+    image_path = segment.get("image_path") or getPhoto(segment["topic"])
+
+    if not draft:
+        return bakeFrame(image_path, size, color)
+
+    # Scale down the full-size bake when there is one; it is far smaller
+    # to decode than the original photo and frames the image identically
+    full_path = bakedPath(image_path, size, color)
+    source = full_path if os.path.exists(full_path) else None
+    return bakeFrame(image_path, draftSize(size), color, source=source)
+
+
 def audioToVideo(
     input_file,
     size,
     fps=30,
     color=(0, 0, 0),
     segment=None,
+    draft=False,
+    audio=True,
 ):
-    audio_file_clip = AudioFileClip(input_file)
-
     if segment is None:
         raise ValueError("segment is required")
 
     duration = segment["end"] - segment["start"]
-    image_path = getPhoto(segment["topic"])
-
-    # ---- Bake background + centered image using PIL ----
-    with Image.open(image_path).convert("RGB") as img:
-        img_width, img_height = img.size
-        bg_width, bg_height = size
-
-        scale = min(bg_width / img_width, bg_height / img_height)
-        new_size = (int(img_width * scale), int(img_height * scale))
-        img = img.resize(new_size, Image.LANCZOS)
-
-        # Create background
-        background = Image.new("RGB", size, color)
-
-        # Center position
-        x = (bg_width - new_size[0]) // 2
-        y = (bg_height - new_size[1]) // 2
-
-        background.paste(img, (x, y))
-
-        baked_path = image_path.replace(".jpeg", "_baked.jpeg")
-        background.save(baked_path, quality=95)
+    if draft:
+        fps = min(fps, DRAFT_ENCODE_PARAMS["fps"])
+    baked_path = segmentFrame(segment, size, color, draft)
 
     # ---- ONE flat ImageClip (fast) ----
     video = ImageClip(baked_path).with_duration(duration).with_fps(fps)
 
-    video.audio = audio_file_clip.subclipped(segment["start"], segment["end"])
+    # audio=False leaves the clip silent so the narration can be attached once
+    if audio:
+        audio_file_clip = AudioFileClip(input_file)
+        video.audio = audio_file_clip.subclipped(segment["start"], segment["end"])
 
     return video
 
@@ -80,18 +292,611 @@ def audioToVideo(
 # -------------------------
 # Keyword-driven generation
 # -------------------------
-def generateEvidAiVideo(audio_file, output_keywords_file, size):
-    with open(output_keywords_file, "r", encoding="utf-8") as f:
-        keywords_data = json.load(f)
+def attachPhotos(segments):
+    """Prefetch every topic's photo concurrently and record it on the segment."""
+    photos = prefetchPhotos(segments)
+    for segment in segments:
+        segment["image_path"] = photos.get(segment["topic"])
+    return segments
+
+
+def segmentDurations(segments, fps):
+    """
+    Frame-aligned durations that tile the narration from the first segment's
+    start to the last segment's end. Each segment runs until the next one
+    starts, so pauses stay in the timeline and rounding never accumulates.
+    Segments shorter than a frame get 0 and are dropped by the callers.
+    """
+    bounds = [segment["start"] for segment in segments] + [segments[-1]["end"]]
+    frames = [round(bound * fps) for bound in bounds]
+    durations = []
+    for segment, start, end in zip(segments, frames, frames[1:]):
+        if end < start:
+            raise ValueError(f"Segment {segment.get('id')} starts before the last")
+        durations.append((end - start) / fps)
+    return durations
+
+
+def narrationSpan(segments, fps):
+    """(start, duration) of the narration covered by segmentDurations."""
+    start = round(segments[0]["start"] * fps) / fps
+    return start, sum(segmentDurations(segments, fps))
 
+
+def segmentsClip(audio_file, segments, size, draft=False, narration=None):
+    """Concatenate the segments' baked stills at size under one narration subclip."""
     clips = []
-    segments = keywords_data["segments_with_keywords"]
+    fps = DRAFT_ENCODE_PARAMS["fps"] if draft else 30
 
-    for i, segment in enumerate(segments):
+    for i, (segment, duration) in enumerate(
+        zip(segments, segmentDurations(segments, fps))
+    ):
         print(f"Processing Segment {i + 1} of {len(segments)}")
-        clips.append(audioToVideo(audio_file, size, segment=segment))
+        if duration == 0:
+            continue
+        clip = audioToVideo(
+            audio_file, size, fps=fps, segment=segment, draft=draft, audio=False
+        )
+        clips.append(clip.with_duration(duration))
+
+    # One narration reader for the whole timeline instead of one per segment
+    start, duration = narrationSpan(segments, fps)
+    narration = narration or AudioFileClip(audio_file)
+    return concatenate_videoclips(clips).with_audio(
+        narration.subclipped(start, start + duration)
+    )
 
-    return clips
+
+def generateEvidAiVideo(audio_file, output_keywords_file, size, draft=False):
+    """Build the narrated slideshow clip at size."""
+    with open(output_keywords_file, "r", encoding="utf-8") as f:
+        keywords_data = json.load(f)
+
+    segments = attachPhotos(keywords_data["segments_with_keywords"])
+    return [segmentsClip(audio_file, segments, size, draft=draft)]
+
+
+def generateEvidAiVariants(audio_file, output_keywords_file, profiles, draft=False):
+    """
+    generateEvidAiVideo for several output profiles: returns {profile name:
+    clips}. Photos are fetched and the narration is opened once; frames are
+    baked per profile size.
+    """
+    with open(output_keywords_file, "r", encoding="utf-8") as f:
+        keywords_data = json.load(f)
+
+    segments = attachPhotos(keywords_data["segments_with_keywords"])
+    narration = AudioFileClip(audio_file)
+    return {
+        profile["name"]: [
+            segmentsClip(
+                audio_file, segments, profile["size"], draft=draft, narration=narration
+            )
+        ]
+        for profile in profiles
+    }
+
+
+# -------------------------
+# Parallel Segment Rendering
+# -------------------------
+def fitClip(clip, size, color=(0, 0, 0)):
+    """Letterbox a clip onto a size canvas so every part shares one resolution."""
+    if tuple(clip.size) == tuple(size):
+        return clip
+
+    scale = min(size[0] / clip.w, size[1] / clip.h)
+    resized = clip.resized(scale).with_position("center")
+    return CompositeVideoClip([resized], size=size, bg_color=color).with_audio(
+        clip.audio
+    )
+
+
+def encodeClip(clip, output_path, threads=1, params=ENCODE_PARAMS):
+    """Encode a clip to output_path using the shared ENCODE_PARAMS (or draft ones)."""
+    with scratchSpace.job_dir("encode") as work_dir:
+        clip.write_videofile(
+            output_path,
+            threads=threads,
+            temp_audiofile=os.path.join(work_dir, "audio.m4a"),
+            logger=None,
+            **params,
+        )
+    return output_path
+
+
+def encodeStill(
+    image_path,
+    audio_file,
+    start,
+    duration,
+    output_path,
+    threads=1,
+    params=ENCODE_PARAMS,
+):
+    """
+    Encode a still image plus an audio subclip to output_path in one ffmpeg
+    pass. The image is decoded and converted to yuv420p once, then repeated
+    by the loop filter, so no frames are rendered in Python or piped in.
+    Output streams match what encodeClip writes with the same params, so the
+    parts still concat with -c copy. audio_file=None writes the video track
+    only.
+    """
+    command = [
+        FFMPEG_BINARY,
+        "-y",
+        "-loglevel",
+        "error",
+        "-framerate",
+        str(params["fps"]),
+        "-i",
+        image_path,
+    ]
+    if audio_file is not None:
+        command += ["-ss", f"{start:.6f}", "-t", f"{duration:.6f}", "-i", audio_file]
+
+    command += [
+        "-map",
+        "0:v",
+        "-vf",
+        "format=yuv420p,loop=loop=-1:size=1:start=0",
+        "-frames:v",
+        str(round(duration * params["fps"])),
+        "-c:v",
+        params["codec"],
+        "-preset",
+        params["preset"],
+        "-r",
+        str(params["fps"]),
+        *params["ffmpeg_params"],
+        "-threads",
+        str(threads),
+    ]
+    if audio_file is not None:
+        command += [
+            "-map",
+            "1:a",
+            "-t",
+            f"{duration:.6f}",
+            *audioParams(params),
+        ]
+
+    subprocess.run([*command, output_path], check=True)
+    return output_path
+
+
+def audioParams(params):
+    return [
+        "-c:a",
+        params["audio_codec"],
+        "-ar",
+        str(params["audio_fps"]),
+        "-ac",
+        "2",
+        "-b:a",
+        params["audio_bitrate"],
+    ]
+
+
+def _renderSegmentJob(job):
+    """Process pool entry point: bake and encode one segment's (silent) video."""
+    size, color, segment, duration, draft, params, output_path, threads = job
+    with metrics.span("segment_encode"):
+        baked_path = segmentFrame(segment, size, color, draft)
+        return encodeStill(
+            baked_path,
+            None,
+            0,
+            duration,
+            output_path,
+            threads=threads,
+            params=params,
+        )
+
+
+def _renderFileJob(job):
+    """Process pool entry point: normalize and encode an intro/outro file."""
+    video_path, volume, size, color, params, output_path, threads = job
+    with metrics.span("branding_encode"):
+        clip = VideoFileClip(video_path).with_volume_scaled(volume)
+        try:
+            fitted = fitClip(clip, size, color)
+            return encodeClip(fitted, output_path, threads=threads, params=params)
+        finally:
+            clip.close()
+
+
+def concatSegments(segment_paths, output_path, audio_path=None):
+    """
+    Join identically encoded files with the ffmpeg concat demuxer (no
+    re-encode). audio_path replaces the parts' audio with that file's track,
+    also stream-copied.
+    """
+    # Replace the previous render atomically in case it is being served
+    temp_output = os.path.splitext(output_path)[0] + "_TEMP.mp4"
+    with scratchSpace.job_dir("concat") as work_dir:
+        list_path = os.path.join(work_dir, "parts.txt")
+        with open(list_path, "w", encoding="utf-8") as f:
+            for path in segment_paths:
+                escaped = os.path.abspath(path).replace("'", "'\\''")
+                f.write(f"file '{escaped}'\n")
+
+        audio = []
+        if audio_path is not None:
+            audio = ["-i", audio_path, "-map", "0:v", "-map", "1:a"]
+        try:
+            subprocess.run(
+                [
+                    FFMPEG_BINARY,
+                    "-y",
+                    "-loglevel",
+                    "error",
+                    "-f",
+                    "concat",
+                    "-safe",
+                    "0",
+                    "-i",
+                    list_path,
+                    *audio,
+                    "-c",
+                    "copy",
+                    "-movflags",
+                    "+faststart",
+                    temp_output,
+                ],
+                check=True,
+            )
+            os.replace(temp_output, output_path)
+        finally:
+            if os.path.exists(temp_output):
+                os.remove(temp_output)
+
+    return output_path
+
+
+def mixAudio(tracks, output_path, params=ENCODE_PARAMS):
+    """
+    Mix tracks into a single encoded audio file in one decode/encode pass.
+    tracks are (path, start, duration, offset) tuples: duration seconds of
+    path from start are mixed in at offset seconds of the output's timeline.
+    """
+    command = [FFMPEG_BINARY, "-y", "-loglevel", "error"]
+    filters = []
+    for i, (path, start, duration, offset) in enumerate(tracks):
+        command += ["-ss", f"{start:.6f}", "-t", f"{duration:.6f}", "-i", path]
+        delay = round(offset * params["audio_fps"])
+        filters.append(
+            f"[{i}:a]aformat=sample_rates={params['audio_fps']}"
+            f":channel_layouts=stereo,adelay=delays={delay}S:all=1[a{i}]"
+        )
+    labels = "".join(f"[a{i}]" for i in range(len(tracks)))
+    filters.append(
+        f"{labels}amix=inputs={len(tracks)}:duration=longest:normalize=0[audio]"
+    )
+
+    subprocess.run(
+        [
+            *command,
+            "-filter_complex",
+            ";".join(filters),
+            "-map",
+            "[audio]",
+            *audioParams(params),
+            output_path,
+        ],
+        check=True,
+    )
+    return output_path
+
+
+def brandingTrack(path, offset):
+    """
+    mixAudio track for an encoded intro/outro part at offset, plus the part's
+    duration. The track is None when the part has no audio.
+    """
+    infos = ffmpeg_parse_infos(path)
+    duration = infos["video_duration"]
+    if not infos["audio_found"]:
+        return None, duration
+    return (path, 0, duration, offset), duration
+
+
+# -------------------------
+# Segment Render Cache
+# -------------------------
+SEGMENT_CACHE_DIR = "Output/segment_cache/"
+SEGMENT_CACHE_MAX_BYTES = int(
+    os.getenv("SEGMENT_CACHE_MAX_BYTES", str(5 * 1024 * 1024 * 1024))
+)
+
+
+def segmentKey(segment, size, fps, color, duration, params=ENCODE_PARAMS):
+    """Hash of everything that affects a rendered segment's bytes."""
+    raw = json.dumps(
+        [
+            fileDigest(segment["image_path"]),
+            duration,
+            list(size),
+            fps,
+            list(color),
+            params,
+        ],
+        sort_keys=True,
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _renderCachedJob(job):
+    """Process pool entry point: encode into a temp file, then publish to the cache."""
+    render_job, args, cache_path, threads = job
+    temp_path = f"{os.path.splitext(cache_path)[0]}.{os.getpid()}.tmp.mp4"
+    try:
+        render_job((*args, temp_path, threads))
+        os.replace(temp_path, cache_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return cache_path
+
+
+# -------------------------
+# Branding Asset Cache
+# -------------------------
+BRANDING_CACHE_DIR = "Output/branding/"
+
+
+def brandingKey(video_path, volume, size, color, params=ENCODE_PARAMS):
+    """Hash of an intro/outro source and the output profile it is encoded to."""
+    raw = json.dumps(
+        [fileDigest(video_path), volume, list(size), list(color), params],
+        sort_keys=True,
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def brandingPart(pool, branding, size, color, threads, params=ENCODE_PARAMS):
+    """
+    Return the cached, profile-normalized encode of an intro/outro, or a
+    future that produces it. branding is a (path, volume) tuple.
+    """
+    video_path, volume = branding
+    key = brandingKey(video_path, volume, size, color, params)
+    cache_path = os.path.join(BRANDING_CACHE_DIR, f"{key}.mp4")
+    cached = os.path.exists(cache_path)
+    if cached:
+        # Keep recency current for scratchSpace.collect_garbage; a file
+        # evicted since the exists check is rendered again
+        try:
+            os.utime(cache_path)
+        except FileNotFoundError:
+            cached = False
+    metrics.cache_result("branding", cached)
+    if cached:
+        return cache_path
+
+    os.makedirs(BRANDING_CACHE_DIR, exist_ok=True)
+    args = (video_path, volume, size, color, params)
+    job = (_renderFileJob, args, cache_path, threads)
+    return pool.submit(_renderCachedJob, job)
+
+
+def pruneSegmentCache(keep=()):
+    """Drop least recently used cached segments beyond SEGMENT_CACHE_MAX_BYTES."""
+    keep = {os.path.abspath(path) for path in keep}
+    entries = []
+    total = 0
+    for entry in os.scandir(SEGMENT_CACHE_DIR):
+        if not entry.name.endswith(".mp4") or ".tmp" in entry.name:
+            continue
+        stat = entry.stat()
+        entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total += stat.st_size
+
+    for _, size, path in sorted(entries):
+        if total <= SEGMENT_CACHE_MAX_BYTES:
+            break
+        if os.path.abspath(path) in keep:
+            continue
+        os.remove(path)
+        total -= size
+
+
+def renderSegments(
+    audio_file,
+    segments,
+    size,
+    intro=None,
+    outro=None,
+    workers=None,
+    output_path=None,
+    color=(0, 0, 0),
+    draft=False,
+    fetch_photos=True,
+):
+    """
+    Render segments' video to the segment cache across a process pool,
+    encoding only those whose inputs changed since they were last rendered,
+    then stream-copy concat everything with the narration (decoded once)
+    and intro/outro audio into output_path. Intro/outro come from the
+    branding cache, so they are only encoded once per output profile.
+    draft renders a low-resolution preview (Output/preview_{date}.mp4 by
+    default) with DRAFT_ENCODE_PARAMS instead. fetch_photos=False uses the
+    image_path already recorded on each segment.
+    """
+    profile = {"name": "default", "size": size, "bitrate": None}
+    outputs = renderProfiles(
+        audio_file,
+        segments,
+        [profile],
+        intro=intro,
+        outro=outro,
+        workers=workers,
+        output_path=output_path,
+        color=color,
+        draft=draft,
+        fetch_photos=fetch_photos,
+    )
+    return outputs["default"]
+
+
+def renderProfiles(
+    audio_file,
+    segments,
+    profiles,
+    intro=None,
+    outro=None,
+    workers=None,
+    output_path=None,
+    color=(0, 0, 0),
+    draft=False,
+    fetch_photos=True,
+):
+    """
+    renderSegments for several output profiles at once. Photos are fetched
+    and the audio is mixed once; frames are baked and parts encoded per
+    profile, all in one process pool so the variants encode in parallel.
+    The first profile is written to output_path, the others next to it
+    (see variantPath). Returns {profile name: output path}.
+    """
+    if not segments:
+        raise ValueError("segments list cannot be empty")
+    if not profiles:
+        raise ValueError("profiles list cannot be empty")
+
+    if fetch_photos:
+        segments = attachPhotos(segments)
+
+    workers = workers or os.cpu_count() or 1
+    # Split the cores between workers instead of oversubscribing x264 threads
+    threads = max(1, (os.cpu_count() or 1) // workers)
+
+    output_paths = variantPaths(output_path or defaultOutputPath(draft), profiles)
+    os.makedirs(SEGMENT_CACHE_DIR, exist_ok=True)
+
+    # Profiles only differ in video settings, so they share fps, timing and audio
+    base_params = DRAFT_ENCODE_PARAMS if draft else ENCODE_PARAMS
+    fps = base_params["fps"]
+    durations = segmentDurations(segments, fps)
+    for segment in segments:
+        if not segment.get("image_path"):
+            raise ValueError(f"No photo found for topic {segment['topic']}")
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        parts = {}
+        reused = 0
+        for profile in profiles:
+            size = profile["size"]
+            params = profileParams(profile, draft)
+            render_size = draftSize(size) if draft else size
+            profile_parts = []
+            if intro:
+                profile_parts.append(
+                    brandingPart(pool, intro, render_size, color, threads, params)
+                )
+
+            for segment, duration in zip(segments, durations):
+                if duration == 0:
+                    continue
+                key = segmentKey(segment, render_size, fps, color, duration, params)
+                cache_path = os.path.join(SEGMENT_CACHE_DIR, f"{key}.mp4")
+                metrics.cache_result("segment", os.path.exists(cache_path))
+                if os.path.exists(cache_path):
+                    os.utime(cache_path)
+                    profile_parts.append(cache_path)
+                    reused += 1
+                    continue
+                args = (size, color, segment, duration, draft, params)
+                job = (_renderSegmentJob, args, cache_path, threads)
+                profile_parts.append(pool.submit(_renderCachedJob, job))
+
+            if outro:
+                profile_parts.append(
+                    brandingPart(pool, outro, render_size, color, threads, params)
+                )
+            parts[profile["name"]] = profile_parts
+
+        print(f"Reusing {reused} of {len(segments) * len(profiles)} cached segments")
+        total = sum(len(profile_parts) for profile_parts in parts.values())
+        part_paths = {}
+        done = 0
+        for name, profile_parts in parts.items():
+            part_paths[name] = []
+            for part in profile_parts:
+                path = part if isinstance(part, str) else part.result()
+                part_paths[name].append(path)
+                done += 1
+                print(f"Rendered part {done} of {total}")
+
+    # Lay the narration and branding audio out on the assembled timeline;
+    # branding audio is the same in every profile's parts
+    primary_parts = part_paths[profiles[0]["name"]]
+    tracks = []
+    offset = 0
+    if intro:
+        track, offset = brandingTrack(primary_parts[0], 0)
+        tracks.append(track)
+    narration_start, narration_duration = narrationSpan(segments, fps)
+    tracks.append((audio_file, narration_start, narration_duration, offset))
+    if outro:
+        track, _ = brandingTrack(primary_parts[-1], offset + narration_duration)
+        tracks.append(track)
+
+    with scratchSpace.job_dir("render") as work_dir:
+        audio_path = os.path.join(work_dir, "audio.m4a")
+        with metrics.span("audio_mux"):
+            mixAudio([t for t in tracks if t], audio_path, base_params)
+        for name, paths in part_paths.items():
+            with metrics.span("concat"):
+                concatSegments(paths, output_paths[name], audio_path=audio_path)
+
+    pruneSegmentCache(keep=[path for paths in part_paths.values() for path in paths])
+    return output_paths
+
+
+def generateVideoParallel(
+    audio_file,
+    output_keywords_file,
+    size,
+    intro=None,
+    outro=None,
+    workers=None,
+    output_path=None,
+    draft=False,
+    profiles=None,
+):
+    """
+    Render each segment to its own intermediate file across a process pool,
+    then stream-copy concat them into output_path (Output/result_{date}.mp4
+    by default). intro/outro are (path, volume) tuples and are normalized to
+    the same profile. draft renders a quick low-resolution preview.
+    profiles renders every listed output profile instead of size and
+    returns {profile name: output path} (see renderProfiles).
+    """
+    with open(output_keywords_file, "r", encoding="utf-8") as f:
+        segments = json.load(f)["segments_with_keywords"]
+
+    if profiles is not None:
+        return renderProfiles(
+            audio_file,
+            segments,
+            profiles,
+            intro=intro,
+            outro=outro,
+            workers=workers,
+            output_path=output_path,
+            draft=draft,
+        )
+
+    return renderSegments(
+        audio_file,
+        segments,
+        size,
+        intro=intro,
+        outro=outro,
+        workers=workers,
+        output_path=output_path,
+        draft=draft,
+    )
 
 
 # -------------------------
@@ -100,11 +905,47 @@ def generateEvidAiVideo(audio_file, output_keywords_file, size):
 if __name__ == "__main__":
     size = (1080, 1920)
     input_file = "Input/Mid.mp3"
+    draft = os.getenv("RENDER_DRAFT") == "1"
+    # e.g. RENDER_PROFILES=vertical,landscape,square renders the whole ladder
+    profile_names = os.getenv("RENDER_PROFILES")
+    profiles = outputProfiles(profile_names.split(",")) if profile_names else None
 
-    clips = [
-        VideoFileClip("Input/Intro.mp4").with_volume_scaled(0.8),
-        *generateEvidAiVideo(input_file, "Output/outputKWE.json", size),
-        VideoFileClip("Input/Outro.mp4").with_volume_scaled(0.8),
-    ]
+    if os.getenv("RENDER_MODE", "parallel") == "parallel":
+        generateVideoParallel(
+            input_file,
+            "Output/outputKWE.json",
+            size,
+            intro=("Input/Intro.mp4", 0.8),
+            outro=("Input/Outro.mp4", 0.8),
+            draft=draft,
+            profiles=profiles,
+        )
+    elif profiles is None:
+        clips = [
+            VideoFileClip("Input/Intro.mp4").with_volume_scaled(0.8),
+            *generateEvidAiVideo(
+                input_file, "Output/outputKWE.json", size, draft=draft
+            ),
+            VideoFileClip("Input/Outro.mp4").with_volume_scaled(0.8),
+        ]
+
+        generateVideo(clips, draft=draft)
+    else:
+        variants = generateEvidAiVariants(
+            input_file, "Output/outputKWE.json", profiles, draft=draft
+        )
+        # One base name so the variants sit side by side, as renderProfiles writes
+        output_paths = variantPaths(defaultOutputPath(draft), profiles)
+        for profile in profiles:
+            clips = [
+                VideoFileClip("Input/Intro.mp4").with_volume_scaled(0.8),
+                *variants[profile["name"]],
+                VideoFileClip("Input/Outro.mp4").with_volume_scaled(0.8),
+            ]
 
-    generateVideo(clips)
+            generateVideo(
+                clips,
+                draft=draft,
+                profile=profile,
+                output_path=output_paths[profile["name"]],
+            )
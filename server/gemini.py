@@ -1,18 +1,189 @@
 from google import genai
+from google.genai import types
 from dotenv import load_dotenv
+from jsonKeywordExtractor import keywordsToTopics
+import hashlib
+import json
+import metrics
 import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to unlocked merges
+    fcntl = None
 
 load_dotenv()
 
 
-client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
-response = client.models.generate_content(
-    model="gemini-3-flash-preview",
-    contents="",
-)
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-3-flash-preview")
+# Overridable so the client can be pointed at a local stand-in server
+GEMINI_BASE_URL = os.getenv("GEMINI_BASE_URL")
+TOPIC_TIMEOUT = float(os.getenv("TOPIC_TIMEOUT", "20"))  # seconds
+
+TOPIC_CACHE_PATH = "Output/topics.json"
+TOPIC_CACHE_MAX_ENTRIES = int(os.getenv("TOPIC_CACHE_MAX_ENTRIES", "50000"))
+# Bump when the prompt changes so cached topics from the old prompt are ignored
+PROMPT_VERSION = 1
+
+PROMPT = """You pick stock photo search queries for narrated video segments.
+For each segment below, reply with a short, concrete, visual topic of 1-3
+words that would find a fitting photo on Pexels. Avoid abstract words.
+Reply with only a JSON array of {"id": <segment id>, "topic": <topic>} objects,
+one per segment, in the same order.
+
+Segments:
+"""
+
+
+# -------------------------
+# Client
+# -------------------------
+_client = None
+
+
+def getClient():
+    """Build the Gemini client on first use; None when no API key is configured."""
+    global _client
+    if _client is None and GEMINI_API_KEY:
+        http_options = types.HttpOptions(
+            base_url=GEMINI_BASE_URL, timeout=int(TOPIC_TIMEOUT * 1000)
+        )
+        _client = genai.Client(api_key=GEMINI_API_KEY, http_options=http_options)
+    return _client
+
+
+# -------------------------
+# Topic Cache
+# -------------------------
+def normalizeText(text):
+    return " ".join(text.split())
+
+
+def topicKey(text):
+    """Key a topic by segment text, model and prompt version."""
+    raw = json.dumps([normalizeText(text), GEMINI_MODEL, PROMPT_VERSION])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+_cache_lock = threading.Lock()
+
+
+def loadTopicCache():
+    try:
+        with open(TOPIC_CACHE_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def saveTopics(topics):
+    """
+    Merge {key: topic} into the cache file. The file is re-read under a file
+    lock so entries written by other worker processes are kept; the oldest
+    entries beyond TOPIC_CACHE_MAX_ENTRIES are dropped.
+    """
+    os.makedirs(os.path.dirname(TOPIC_CACHE_PATH), exist_ok=True)
+    with _cache_lock, open(f"{TOPIC_CACHE_PATH}.lock", "w") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+        cache = loadTopicCache()
+        for key, topic in topics.items():
+            cache.pop(key, None)
+            cache[key] = topic
+
+        overflow = len(cache) - TOPIC_CACHE_MAX_ENTRIES
+        if overflow > 0:
+            for key in list(cache)[:overflow]:
+                del cache[key]
+
+        temp_path = f"{TOPIC_CACHE_PATH}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(cache, f, ensure_ascii=False)
+        os.replace(temp_path, TOPIC_CACHE_PATH)
+
+
+# -------------------------
+# Batched Generation
+# -------------------------
+def requestTopics(texts):
+    """
+    Ask the model for a topic for every text in one request.
+    Returns {index: topic} for the answers that came back usable.
+    """
+    segments = [{"id": i, "text": text} for i, text in enumerate(texts)]
+    response = getClient().models.generate_content(
+        model=GEMINI_MODEL,
+        contents=PROMPT + json.dumps(segments, ensure_ascii=False),
+        config=types.GenerateContentConfig(
+            response_mime_type="application/json", temperature=0.2
+        ),
+    )
+
+    topics = {}
+    for item in json.loads(response.text or "[]"):
+        if not isinstance(item, dict):
+            continue
+        index, topic = item.get("id"), item.get("topic")
+        if isinstance(index, int) and 0 <= index < len(texts):
+            if isinstance(topic, str) and topic.strip():
+                topics[index] = " ".join(topic.split())
+    return topics
+
+
+def generateTopics(keywords_data):
+    """
+    Set a topic on every segment of keywords_data (the output of
+    jsonKeywordExtractor.extractKeywords). Topics are cached by segment text;
+    the uncached texts go to the model in a single batched request. Segments
+    the model does not answer (no API key, timeout, bad reply) get the
+    keyword heuristic from keywordsToTopics instead.
+    """
+    cache = loadTopicCache()
+    pending = {}
+    for segment in keywords_data:
+        key = topicKey(segment["text"])
+        topic = cache.get(key)
+        metrics.cache_result("topic", topic is not None)
+        if topic is not None:
+            segment["topic"] = topic
+        else:
+            pending.setdefault(key, []).append(segment)
+
+    if not pending:
+        return keywords_data
+
+    keys = list(pending)
+    answered = {}
+    if getClient() is not None:
+        try:
+            with metrics.span("topics"):
+                texts = [pending[key][0]["text"] for key in keys]
+                answered = requestTopics(texts)
+        except Exception as e:
+            print(f"Topic generation failed, using keyword topics: {str(e)}")
+
+    fallback = []
+    new_topics = {}
+    for index, key in enumerate(keys):
+        if index not in answered:
+            fallback.extend(pending[key])
+            continue
+        new_topics[key] = answered[index]
+        for segment in pending[key]:
+            segment["topic"] = answered[index]
+
+    keywordsToTopics(fallback)
+    if new_topics:
+        saveTopics(new_topics)
+    return keywords_data
+
 
-print(response.text)
+if __name__ == "__main__":
+    import jsonKeywordExtractor as jke
 
-# Pexels API
-# https://api.pexels.com/v1/ for images
-# https://api.pexels.com/videos/ for videos
+    segments = generateTopics(jke.extractKeywords("Output/output.json"))
+    for segment in segments:
+        print(f"{segment['start']:7.2f}s  {segment['topic']}")
@@ -0,0 +1,337 @@
+import asyncio
+import heapq
+import itertools
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+import metrics
+
+# Configuration
+JOBS_FOLDER = "Output/jobs"
+INTRO_PATH = "Input/Intro.mp4"
+OUTRO_PATH = "Input/Outro.mp4"
+BRANDING_VOLUME = 0.8
+
+STAGES = ["transcribe", "keywords", "photos", "render"]
+RENDER_STAGES = ["photos", "render"]
+
+# Each stage gets its own executor and concurrency limit so stages with
+# different resource profiles overlap: Whisper and x264 are CPU-bound and
+# run in processes, Pexels fetches are network-bound and run on threads.
+STAGE_EXECUTORS = {
+    "transcribe": "process",
+    "keywords": "process",
+    "photos": "thread",
+    "render": "process",
+}
+STAGE_LIMITS = {
+    stage: int(os.getenv(f"{stage.upper()}_CONCURRENCY", default))
+    for stage, default in [
+        ("transcribe", "1"),
+        ("keywords", "2"),
+        ("photos", "4"),
+        ("render", "1"),
+    ]
+}
+
+# Output profiles (createVideo.OUTPUT_PROFILES names) rendered by every full
+# render; the first is the project's main video. Drafts render only the first.
+RENDER_PROFILES = os.getenv("RENDER_PROFILES", "vertical").split(",")
+
+# Lower runs first when jobs wait for the same stage
+INTERACTIVE_PRIORITY = 0
+BATCH_PRIORITY = int(os.getenv("BATCH_PRIORITY", "10"))
+
+
+# ====================
+# Stage Functions (run in worker processes)
+# ====================
+
+
+def transcribe_stage(audio_path: str) -> dict:
+    """Transcribe audio, reusing cached transcripts of identical files"""
+    import EvidAi
+
+    return EvidAi.transcribeCached(audio_path)
+
+
+def keywords_stage(transcript: dict, keywords_path: str) -> dict:
+    """Extract keywords and generate photo topics from an in-memory transcript"""
+    import gemini
+    import jsonKeywordExtractor as jke
+
+    with metrics.span("keywords"):
+        return jke.saveKeywordsToFile(
+            transcript, keywords_path, topicGenerator=gemini.generateTopics
+        )
+
+
+def photos_stage(segments: List[dict]) -> List[dict]:
+    """Fetch each topic's photo and record it on a copy of the segment"""
+    import createVideo
+
+    try:
+        return createVideo.attachPhotos([dict(segment) for segment in segments])
+    finally:
+        # Photo cache hits record no span, so nothing else would publish them
+        metrics.publish()
+
+
+def render_stage(
+    audio_path: str, segments: List[dict], video_path: str, draft: bool = False
+) -> Dict[str, str]:
+    """
+    Render every RENDER_PROFILES variant (or a draft preview of the first),
+    re-encoding only changed segments. Returns {profile name: video path}.
+    """
+    import createVideo
+
+    profiles = createVideo.outputProfiles(RENDER_PROFILES)
+    if draft:
+        profiles = profiles[:1]
+    intro = (INTRO_PATH, BRANDING_VOLUME) if os.path.exists(INTRO_PATH) else None
+    outro = (OUTRO_PATH, BRANDING_VOLUME) if os.path.exists(OUTRO_PATH) else None
+    return createVideo.renderProfiles(
+        audio_path,
+        segments,
+        profiles,
+        intro=intro,
+        outro=outro,
+        output_path=video_path,
+        draft=draft,
+        fetch_photos=False,
+    )
+
+
+# ====================
+# Job Records
+# ====================
+
+
+def new_job(stages: List[str] = STAGES) -> dict:
+    """Create the job record stored on a project"""
+    return {
+        "status": "queued",
+        "stage": None,
+        "progress": 0.0,
+        "error": None,
+        # The server process whose event loop runs the job
+        "pid": os.getpid(),
+        "stages": {
+            stage: {"status": "pending", "startedAt": None, "finishedAt": None}
+            for stage in stages
+        },
+    }
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def job_orphaned(job: dict) -> bool:
+    """
+    A queued or running job whose server process is gone (or is a previous
+    process whose pid this one inherited) will never finish.
+    """
+    if job.get("status") not in ("queued", "running"):
+        return False
+    pid = job.get("pid")
+    return not pid or pid == os.getpid() or not _pid_alive(pid)
+
+
+def interrupt_job(job: dict) -> None:
+    """Mark an orphaned job failed so the project can be rendered again"""
+    now = datetime.now().isoformat()
+    for stage_state in job["stages"].values():
+        if stage_state["status"] == "running":
+            stage_state["status"] = "failed"
+            stage_state["finishedAt"] = now
+    job["status"] = "failed"
+    job["error"] = "interrupted"
+
+
+# ====================
+# Stage Scheduling
+# ====================
+
+
+class StageScheduler:
+    """
+    Admit at most `limit` jobs into one stage at a time. Jobs that have to
+    wait are admitted lowest priority value first, then in arrival order.
+    """
+
+    def __init__(self, stage: str, kind: str, limit: int):
+        self.stage = stage
+        self.kind = kind
+        self.limit = max(1, limit)
+        self._running = 0
+        self._waiting: list = []
+        self._order = itertools.count()
+        self._executor: Optional[Executor] = None
+
+    def executor(self) -> Executor:
+        if self._executor is None:
+            pool = ProcessPoolExecutor if self.kind == "process" else ThreadPoolExecutor
+            self._executor = pool(max_workers=self.limit)
+        return self._executor
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def run(self, priority: int, fn: Callable, *args):
+        await self._acquire(priority)
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor(), fn, *args)
+        finally:
+            self._release()
+
+    async def _acquire(self, priority: int) -> None:
+        if self._running < self.limit and not self._waiting:
+            self._running += 1
+            return
+
+        turn = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiting, (priority, next(self._order), turn))
+        try:
+            await turn
+        except asyncio.CancelledError:
+            # The slot may have been handed over just before the cancellation
+            if turn.done() and not turn.cancelled():
+                self._release()
+            raise
+
+    def _release(self) -> None:
+        # Hand the slot straight to the next live waiter
+        while self._waiting:
+            _, _, turn = heapq.heappop(self._waiting)
+            if not turn.done():
+                turn.set_result(None)
+                return
+        self._running -= 1
+
+
+_schedulers: Dict[str, StageScheduler] = {}
+
+
+def get_scheduler(stage: str) -> StageScheduler:
+    scheduler = _schedulers.get(stage)
+    if scheduler is None:
+        scheduler = StageScheduler(stage, STAGE_EXECUTORS[stage], STAGE_LIMITS[stage])
+        _schedulers[stage] = scheduler
+    return scheduler
+
+
+def shutdown_executor() -> None:
+    for scheduler in _schedulers.values():
+        scheduler.shutdown()
+    _schedulers.clear()
+
+
+# ====================
+# Orchestration
+# ====================
+
+
+async def run_job(
+    project_id: str,
+    load_project: Callable[[str], Optional[dict]],
+    store_project: Callable[[dict], str],
+    stages: List[str] = STAGES,
+    draft: bool = False,
+    priority: int = INTERACTIVE_PRIORITY,
+) -> Optional[Dict[str, str]]:
+    """
+    Chain transcribe -> keywords -> photos -> render for a project without
+    blocking the event loop. Every stage goes through its own scheduler, so
+    one job's render overlaps with the next job's transcription; priority
+    orders jobs waiting for the same stage. Job state is written back to the
+    project record after every transition. Keyword output is saved as the
+    project's storyboard; running only RENDER_STAGES re-renders from the
+    (possibly edited) storyboard. draft renders a low-resolution preview
+    instead of the publishable video.
+    Returns {profile name: video path} for the rendered variants, main
+    video first, or None on failure.
+    """
+    project = load_project(project_id)
+    if project is None:
+        return None
+
+    job = project.get("job") or new_job(stages)
+    job_dir = os.path.join(JOBS_FOLDER, project_id)
+    os.makedirs(job_dir, exist_ok=True)
+
+    audio_path = project["audioFile"]["path"]
+    keywords_path = os.path.join(job_dir, "outputKWE.json")
+    prefix = "preview" if draft else "result"
+    video_path = os.path.join("Output", f"{prefix}_{project['timestamp']}.mp4")
+
+    # Each stage receives the previous stage's in-memory result
+    stage_calls = {
+        "transcribe": lambda _: (transcribe_stage, audio_path),
+        "keywords": lambda transcript: (keywords_stage, transcript, keywords_path),
+        "photos": lambda segments: (photos_stage, segments),
+        "render": lambda segments: (
+            render_stage,
+            audio_path,
+            segments,
+            video_path,
+            draft,
+        ),
+    }
+    storyboard = project.get("storyboard") or {}
+
+    def publish(**updates) -> None:
+        current = load_project(project_id)
+        if current is not None:
+            current["job"] = job
+            current.update(updates)
+            store_project(current)
+
+    job["status"] = "running"
+    result = storyboard.get("segments")
+
+    for i, stage in enumerate(stages):
+        stage_state = job["stages"][stage]
+        job["stage"] = stage
+        stage_state["status"] = "running"
+        stage_state["startedAt"] = datetime.now().isoformat()
+        publish()
+
+        try:
+            fn, *args = stage_calls[stage](result)
+            with metrics.queued(stage):
+                result = await get_scheduler(stage).run(priority, fn, *args)
+        except Exception as e:
+            print(f"Job {project_id} failed during {stage}: {str(e)}")
+            stage_state["status"] = "failed"
+            stage_state["finishedAt"] = datetime.now().isoformat()
+            job["status"] = "failed"
+            job["error"] = f"{stage}: {e}"
+            publish()
+            return None
+
+        updates = {}
+        if stage == "keywords":
+            result = result["segments_with_keywords"]
+            updates["storyboard"] = {"segments": result}
+
+        stage_state["status"] = "done"
+        stage_state["finishedAt"] = datetime.now().isoformat()
+        job["progress"] = (i + 1) / len(stages)
+        publish(**updates)
+
+    job["status"] = "done"
+    job["stage"] = None
+    publish()
+    return result
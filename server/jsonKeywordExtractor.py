@@ -1,92 +1,139 @@
 import json
-import nltk
-import string
-from collections import Counter
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
+import re
+import numpy as np
 
-# Download required NLTK data if not already present
-try:
-    nltk.data.find("tokenizers/punkt_tab")
-except LookupError:
-    nltk.download("punkt_tab", quiet=True)
+# English stopwords (the NLTK list), bundled so importing this module never
+# touches the network or the NLTK data path
+STOPWORDS = frozenset(
+    """
+    i me my myself we our ours ourselves you you're you've you'll you'd your
+    yours yourself yourselves he him his himself she she's her hers herself it
+    it's its itself they them their theirs themselves what which who whom this
+    that that'll these those am is are was were be been being have has had
+    having do does did doing a an the and but if or because as until while of
+    at by for with about against between into through during before after
+    above below to from up down in out on off over under again further then
+    once here there when where why how all any both each few more most other
+    some such no nor not only own same so than too very s t can will just don
+    don't should should've now d ll m o re ve y ain aren aren't couldn couldn't
+    didn didn't doesn doesn't hadn hadn't hasn hasn't haven haven't isn isn't
+    ma mightn mightn't mustn mustn't needn needn't shan shan't shouldn
+    shouldn't wasn wasn't weren weren't won won't wouldn wouldn't
+    """.split()
+)
+
+# Alphanumeric runs (unicode aware, no underscores); punctuation is never a token
+TOKEN_PATTERN = re.compile(r"[^\W_]+")
+
+MAX_KEYWORDS = 5
+MIN_KEYWORD_LENGTH = 3
+
+
+def tokenize(text):
+    """Lowercase text and return its candidate keywords in order."""
+    return [
+        word
+        for word in TOKEN_PATTERN.findall(text.lower())
+        if len(word) >= MIN_KEYWORD_LENGTH and word not in STOPWORDS
+    ]
+
+
+def loadTranscript(json_data):
+    """
+    Accept a transcript JSON file path, an in-memory transcript dict
+    (e.g. the result of EvidAi.transcribe) or a bare list of segments,
+    and return the dict.
+    """
+    if isinstance(json_data, list):
+        return {"segments": json_data}
+    if isinstance(json_data, dict):
+        return json_data
+
+    with open(json_data, "r", encoding="utf-8") as f:
+        return json.load(f)
 
-try:
-    nltk.data.find("corpora/stopwords")
-except LookupError:
-    nltk.download("stopwords", quiet=True)
 
-STOPWORDS = set(stopwords.words("english"))
+def scoreKeywords(token_lists, max_keywords=MAX_KEYWORDS):
+    """
+    Score every (segment, word) pair in one vectorized pass and return the top
+    keywords per segment. Score = term frequency * word length * smoothed IDF,
+    so words that recur in a segment but are rare across the transcript win.
+    Ties keep first-occurrence order.
+    """
+    vocab = {}
+    seg_ids = []
+    word_ids = []
+    for seg_id, tokens in enumerate(token_lists):
+        for word in tokens:
+            word_ids.append(vocab.setdefault(word, len(vocab)))
+            seg_ids.append(seg_id)
+
+    n_segments = len(token_lists)
+    if not vocab:
+        return [[] for _ in range(n_segments)]
+
+    words = np.array(list(vocab), dtype=object)
+    word_lengths = np.fromiter((len(word) for word in vocab), dtype=np.float64)
+    seg_ids = np.asarray(seg_ids, dtype=np.int64)
+    word_ids = np.asarray(word_ids, dtype=np.int64)
+
+    # Unique (segment, word) pairs with term counts and first positions
+    pair_keys = seg_ids * len(vocab) + word_ids
+    keys, first_pos, counts = np.unique(
+        pair_keys, return_index=True, return_counts=True
+    )
+    pair_segs = keys // len(vocab)
+    pair_words = keys % len(vocab)
+
+    doc_freq = np.bincount(pair_words, minlength=len(vocab))
+    idf = np.log((1 + n_segments) / (1 + doc_freq)) + 1
+    scores = counts * word_lengths[pair_words] * idf[pair_words]
+
+    # Group by segment, best score first, earliest word first on ties
+    order = np.lexsort((first_pos, -scores, pair_segs))
+    sorted_segs = pair_segs[order]
+    starts = np.searchsorted(sorted_segs, np.arange(n_segments), side="left")
+    ends = np.searchsorted(sorted_segs, np.arange(n_segments), side="right")
+
+    return [
+        words[pair_words[order[start : min(end, start + max_keywords)]]].tolist()
+        for start, end in zip(starts, ends)
+    ]
 
 
 def extractKeywords(json_data):
     """
     Extract keywords from each sentence/segment in the JSON data.
+    json_data may be a file path, a loaded transcript dict or a segment list.
+    All segments are tokenized and scored together in one batch.
     Returns a list of dictionaries with segment info and extracted keywords.
     """
-    with open(json_data, "r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    results = []
-
-    for segment in data["segments"]:
-        text = segment["text"].strip()
+    segments = loadTranscript(json_data)["segments"]
+    texts = [segment["text"].strip() for segment in segments]
+    keywords = scoreKeywords([tokenize(text) for text in texts])
 
-        # Tokenize the text
-        tokens = word_tokenize(text.lower())
-
-        # Filter out stopwords, punctuation, and short words
-        candidate_keywords = [
-            word
-            for word in tokens
-            if word not in STOPWORDS
-            and word not in string.punctuation
-            and len(word) > 2
-            and word.isalnum()
-        ]
-
-        # Score keywords by frequency and length
-        word_freq = Counter(candidate_keywords)
-
-        # Calculate scores: frequency * length (longer, more frequent words score higher)
-        keyword_scores = {word: (freq * len(word)) for word, freq in word_freq.items()}
-
-        # Sort by score (descending) and select top 5
-        sorted_keywords = sorted(
-            keyword_scores.items(), key=lambda x: x[1], reverse=True
-        )
-
-        # Extract top 3-5 keywords (prefer 5, but at least 3 if available)
-        top_keywords = [word for word, score in sorted_keywords[:5]]
-
-        # Ensure we have at least 3 keywords if available, but not more than 5
-        if len(top_keywords) < 3 and len(candidate_keywords) >= 3:
-            # If we have fewer than 3, take up to 3 from candidates
-            top_keywords = list(dict.fromkeys(candidate_keywords))[:3]
-        elif len(top_keywords) > 5:
-            top_keywords = top_keywords[:5]
-
-        # Create result entry with segment info and keywords
-        result_entry = {
+    return [
+        {
             "id": segment["id"],
             "start": segment["start"],
             "end": segment["end"],
             "text": text,
             "keywords": top_keywords,
         }
-
-        results.append(result_entry)
-
-    return results
+        for segment, text, top_keywords in zip(segments, texts, keywords)
+    ]
 
 
-def saveKeywordsToFile(json_data, output_path):
+def saveKeywordsToFile(json_data, output_path, topicGenerator=None):
     """
     Extract keywords from JSON data and save to output file.
+    topicGenerator sets each segment's topic (e.g. gemini.generateTopics);
+    it defaults to the keywordsToTopics heuristic.
     """
-    keywords_data = keywordsToTopics(extractKeywords(json_data))
+    topicGenerator = topicGenerator or keywordsToTopics
+    keywords_data = topicGenerator(extractKeywords(json_data))
     output_data = {
-        "source_file": json_data,
+        "source_file": json_data if isinstance(json_data, str) else None,
         "total_segments": len(keywords_data),
         "segments_with_keywords": keywords_data,
     }
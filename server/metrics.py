@@ -0,0 +1,293 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to unlocked compaction
+    fcntl = None
+
+# Configuration
+METRICS_DIR = os.getenv("METRICS_DIR", "Output/metrics")
+DURATION_BUCKETS = [0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600]
+
+METRIC_HELP = {
+    "evidai_stage_duration_seconds": (
+        "histogram",
+        "Time spent in each pipeline stage",
+    ),
+    "evidai_stage_errors_total": ("counter", "Pipeline stage failures"),
+    "evidai_cache_requests_total": ("counter", "Cache lookups by cache and result"),
+    "evidai_queue_depth": ("gauge", "Work waiting or running, by queue"),
+}
+
+LabelKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+_lock = threading.Lock()
+_flush_lock = threading.Lock()
+_counters: Dict[LabelKey, float] = {}
+_histograms: Dict[LabelKey, dict] = {}
+_gauges: Dict[LabelKey, float] = {}
+
+
+def _reset_after_fork() -> None:
+    """Forked workers must not re-publish the parent's counts under their pid"""
+    global _lock, _flush_lock
+    _lock = threading.Lock()
+    _flush_lock = threading.Lock()
+    _counters.clear()
+    _histograms.clear()
+    _gauges.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _key(name: str, labels: dict) -> LabelKey:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+# ====================
+# Recording
+# ====================
+
+
+def inc(name: str, amount: float = 1, **labels) -> None:
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def observe(name: str, value: float, **labels) -> None:
+    key = _key(name, labels)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            buckets = [0] * len(DURATION_BUCKETS)
+            histogram = {"buckets": buckets, "sum": 0.0, "count": 0}
+            _histograms[key] = histogram
+        for i, bound in enumerate(DURATION_BUCKETS):
+            if value <= bound:
+                histogram["buckets"][i] += 1
+        histogram["sum"] += value
+        histogram["count"] += 1
+
+
+def add_gauge(name: str, delta: float, **labels) -> None:
+    """Gauges are live values of this process and are not shared via METRICS_DIR"""
+    key = _key(name, labels)
+    with _lock:
+        _gauges[key] = _gauges.get(key, 0) + delta
+
+
+def set_gauge(name: str, value: float, **labels) -> None:
+    with _lock:
+        _gauges[_key(name, labels)] = value
+
+
+def cache_result(cache: str, hit: bool) -> None:
+    inc("evidai_cache_requests_total", cache=cache, result="hit" if hit else "miss")
+
+
+@contextmanager
+def span(stage: str):
+    """Time a pipeline stage, count failures and publish this process's metrics"""
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        inc("evidai_stage_errors_total", stage=stage)
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        observe("evidai_stage_duration_seconds", duration, stage=stage)
+        publish()
+
+
+@contextmanager
+def queued(queue: str):
+    """Track work waiting or running in a queue as a gauge"""
+    add_gauge("evidai_queue_depth", 1, queue=queue)
+    try:
+        yield
+    finally:
+        add_gauge("evidai_queue_depth", -1, queue=queue)
+
+
+# ====================
+# Cross-process Sharing
+# ====================
+
+
+def _snapshot() -> dict:
+    with _lock:
+        return {
+            "counters": [
+                [name, labels, value] for (name, labels), value in _counters.items()
+            ],
+            "histograms": [
+                [name, labels, dict(value, buckets=list(value["buckets"]))]
+                for (name, labels), value in _histograms.items()
+            ],
+        }
+
+
+def flush() -> None:
+    """
+    Write this process's counters and histograms to METRICS_DIR/<pid>.json.
+    Pipeline workers exit without running atexit hooks, so spans flush as
+    they finish.
+    """
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    path = os.path.join(METRICS_DIR, f"{os.getpid()}.json")
+    temp_path = f"{path}.tmp"
+    # Spans end on many threads (e.g. photo prefetch) sharing this pid's file
+    with _flush_lock:
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(_snapshot(), f)
+        os.replace(temp_path, path)
+
+
+def publish() -> None:
+    """
+    Flush for callers outside a span, e.g. a worker whose cache lookups all
+    hit. Publishing metrics must never fail the stage or mask its error.
+    """
+    try:
+        flush()
+    except OSError as e:
+        print(f"Error flushing metrics: {str(e)}")
+
+
+def _merge(total: dict, snapshot: dict) -> None:
+    for name, labels, value in snapshot["counters"]:
+        key = _key(name, dict(labels))
+        total["counters"][key] = total["counters"].get(key, 0) + value
+    for name, labels, value in snapshot["histograms"]:
+        key = _key(name, dict(labels))
+        existing = total["histograms"].get(key)
+        if existing is None:
+            total["histograms"][key] = dict(value, buckets=list(value["buckets"]))
+            continue
+        existing["buckets"] = [
+            a + b for a, b in zip(existing["buckets"], value["buckets"])
+        ]
+        existing["sum"] += value["sum"]
+        existing["count"] += value["count"]
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _to_snapshot(total: dict) -> dict:
+    return {
+        "counters": [[n, l, v] for (n, l), v in total["counters"].items()],
+        "histograms": [[n, l, v] for (n, l), v in total["histograms"].items()],
+    }
+
+
+def collect() -> dict:
+    """
+    Sum metrics from every process. Files left by exited workers are folded
+    into archive.json so the directory doesn't grow with each new pool.
+    """
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    total = {"counters": {}, "histograms": {}}
+
+    with open(os.path.join(METRICS_DIR, ".lock"), "w") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+        archive_path = os.path.join(METRICS_DIR, "archive.json")
+        archive = {"counters": {}, "histograms": {}}
+        if os.path.exists(archive_path):
+            with open(archive_path, "r", encoding="utf-8") as f:
+                _merge(archive, json.load(f))
+
+        archived = False
+        for entry in os.scandir(METRICS_DIR):
+            stem, ext = os.path.splitext(entry.name)
+            if ext != ".json" or not stem.isdigit():
+                continue
+            pid = int(stem)
+            if pid == os.getpid():
+                continue  # read from memory below
+            try:
+                with open(entry.path, "r", encoding="utf-8") as f:
+                    snapshot = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                continue
+            if _pid_alive(pid):
+                _merge(total, snapshot)
+            else:
+                _merge(archive, snapshot)
+                os.remove(entry.path)
+                archived = True
+
+        if archived:
+            temp_path = f"{archive_path}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(_to_snapshot(archive), f)
+            os.replace(temp_path, archive_path)
+
+    _merge(total, _to_snapshot(archive))
+    _merge(total, _snapshot())
+    return total
+
+
+# ====================
+# Prometheus Exposition
+# ====================
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels, extra=()) -> str:
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def render() -> str:
+    """Render all metrics in the Prometheus text exposition format"""
+    total = collect()
+    with _lock:
+        gauges = dict(_gauges)
+
+    series: Dict[str, list] = {}
+    for (name, labels), value in total["counters"].items():
+        series.setdefault(name, []).append(f"{name}{_labels(labels)} {value}")
+    for (name, labels), value in gauges.items():
+        series.setdefault(name, []).append(f"{name}{_labels(labels)} {value}")
+    for (name, labels), value in total["histograms"].items():
+        lines = series.setdefault(name, [])
+        for bound, count in zip(DURATION_BUCKETS, value["buckets"]):
+            bucket_labels = _labels(labels, [("le", str(bound))])
+            lines.append(f"{name}_bucket{bucket_labels} {count}")
+        lines.append(
+            f"{name}_bucket{_labels(labels, [('le', '+Inf')])} {value['count']}"
+        )
+        lines.append(f"{name}_sum{_labels(labels)} {value['sum']}")
+        lines.append(f"{name}_count{_labels(labels)} {value['count']}")
+
+    output = []
+    for name in sorted(series):
+        metric_type, help_text = METRIC_HELP.get(name, ("untyped", name))
+        output.append(f"# HELP {name} {help_text}")
+        output.append(f"# TYPE {name} {metric_type}")
+        output.extend(series[name])
+    return "\n".join(output) + "\n"
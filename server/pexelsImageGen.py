@@ -1,13 +1,25 @@
 from google import genai
 from dotenv import load_dotenv
-from pexelsapi.pexels import Pexels
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from photoCache import PhotoCache, DEFAULT_MAX_BYTES
+import metrics
 import os
+import random
+import time
 import requests
 
 load_dotenv()
 
 
-pexel = Pexels(os.getenv("PEXELS_API_KEY"))
+# Overridable so the client can be pointed at a local stand-in server
+PEXELS_API_URL = os.getenv("PEXELS_API_URL", "https://api.pexels.com/v1").rstrip("/")
+PEXELS_API_KEY = os.getenv("PEXELS_API_KEY")
+MAX_IN_FLIGHT = int(os.getenv("PEXELS_MAX_IN_FLIGHT", "8"))
+MAX_RETRIES = 5
+REQUEST_TIMEOUT = 30
+# Longest wait a single Retry-After may impose before the next attempt
+MAX_RETRY_AFTER = 30
 
 
 # print("Enter Video Title:")
@@ -37,32 +49,148 @@ pexel = Pexels(os.getenv("PEXELS_API_KEY"))
 #         f.write(response.content)
 #     print(f"Photo downloaded to {filepath}")
 output_dir = "Output/photos/"
+photo_cache = PhotoCache(
+    output_dir,
+    max_bytes=int(os.getenv("PHOTO_CACHE_MAX_BYTES", str(DEFAULT_MAX_BYTES))),
+)
+
+
+# -------------------------
+# HTTP Session
+# -------------------------
+def createSession(pool_size=MAX_IN_FLIGHT):
+    """Create a keep-alive session whose connection pool fits pool_size requests."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    if PEXELS_API_KEY:
+        session.headers["Authorization"] = PEXELS_API_KEY
+    return session
+
+
+_session = None
+
+
+def getSession():
+    global _session
+    if _session is None:
+        _session = createSession()
+    return _session
+
+
+def requestWithBackoff(session, url, **kwargs):
+    """
+    GET url, retrying 429 and 5xx responses with exponential backoff.
+    Retry-After is honored when the server sends it, up to MAX_RETRY_AFTER
+    seconds per attempt.
+    """
+    kwargs.setdefault("timeout", REQUEST_TIMEOUT)
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            response = session.get(url, **kwargs)
+        except requests.ConnectionError:
+            if attempt == MAX_RETRIES:
+                raise
+            response = None
+
+        retryable = response is None or response.status_code == 429
+        if response is not None and response.status_code >= 500:
+            retryable = True
+        if not retryable:
+            return response
+        if attempt == MAX_RETRIES:
+            return response
+
+        delay = min(2**attempt, 30) + random.uniform(0, 0.5)
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                delay = min(int(retry_after), MAX_RETRY_AFTER)
+        time.sleep(delay)
+
+
+# -------------------------
+# Photo Lookup
+# -------------------------
+def searchPhoto(topic, session=None):
+    """Return the first Pexels search result for topic, or None."""
+    session = session or getSession()
+    response = requestWithBackoff(
+        session,
+        f"{PEXELS_API_URL}/search",
+        params={"query": topic, "page": 1, "per_page": 15},
+    )
+    if response.status_code != 200:
+        return None
 
+    photos = response.json().get("photos", [])
+    return photos[0] if photos else None
 
-def getPhoto(topic):
-    for photo in os.listdir(
-        output_dir
-    ):  # Make this more effecient by numbering the photos or topics idk
-        if photo.startswith(topic):
-            print(f"Photo found in {output_dir}: {photo}")
-            return os.path.join(output_dir, photo)
 
-    search_photos = pexel.search_photos(
-        query=topic, orientation="", size="", color="", locale="", page=1, per_page=15
-    )
+def downloadPhoto(topic, photo, session=None):
+    """Download a Pexels photo's original rendition into the photo cache."""
+    session = session or getSession()
+    photo_url = photo["src"]["original"]
+    response = requestWithBackoff(session, photo_url)
 
-    first_photo = search_photos["photos"][0]
-    photo_url = first_photo["src"]["original"]
-    response = requests.get(photo_url)
+    if response.status_code != 200:
+        return None
 
-    if response.status_code == 200:
-        file_extension = os.path.splitext(photo_url.split("?")[0])[1] or ".jpg"
-        filename = f"{first_photo['id']}{file_extension}"
-        filepath = os.path.join(output_dir, filename)
-        with open(filepath, "wb") as f:
-            f.write(response.content)
-        print(f"Photo downloaded to {filepath}")
-        return filepath
+    file_extension = os.path.splitext(photo_url.split("?")[0])[1] or ".jpg"
+    filepath = photo_cache.put(topic, photo["id"], response.content, file_extension)
+    print(f"Photo downloaded to {filepath}")
+    return filepath
 
-    else:
+
+def getPhoto(topic, session=None):
+    cached = photo_cache.lookupTopic(topic)
+    metrics.cache_result("photo", cached is not None)
+    if cached:
+        print(f"Photo found in {output_dir}: {cached}")
+        return cached
+
+    with metrics.span("photo_resolve"):
+        first_photo = searchPhoto(topic, session)
+    if first_photo is None:
         return None
+
+    # A different topic may already have pulled the same Pexels photo
+    cached = photo_cache.lookupPhoto(topic, first_photo["id"])
+    if cached:
+        print(f"Photo found in {output_dir}: {cached}")
+        return cached
+
+    with metrics.span("photo_download"):
+        return downloadPhoto(topic, first_photo, session)
+
+
+# -------------------------
+# Batch Prefetch
+# -------------------------
+def prefetchPhotos(segments, max_in_flight=MAX_IN_FLIGHT):
+    """
+    Resolve and download the photo for every distinct segment topic at once.
+    Returns {topic: filepath}; topics that could not be fetched map to None.
+    """
+    topics = list(dict.fromkeys(segment["topic"] for segment in segments))
+    if not topics:
+        return {}
+
+    session = createSession(max_in_flight)
+
+    def fetch(topic):
+        try:
+            return getPhoto(topic, session)
+        except requests.RequestException as e:
+            print(f"Error fetching photo for {topic}: {str(e)}")
+            return None
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+            paths = list(pool.map(fetch, topics))
+    finally:
+        session.close()
+        photo_cache.flush()
+
+    return dict(zip(topics, paths))
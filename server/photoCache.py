@@ -0,0 +1,219 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to unlocked merges
+    fcntl = None
+
+INDEX_FILENAME = "index.json"
+LOCK_FILENAME = "index.lock"
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024 * 1024  # 2GB
+
+
+def normalizeTopic(topic):
+    """Lowercase and collapse whitespace so equivalent topics share one entry."""
+    return " ".join(topic.lower().split())
+
+
+class PhotoCache:
+    """
+    Persistent topic -> Pexels id -> content-hashed file index.
+
+    The index lives in <directory>/index.json. Files are stored once per
+    distinct content (sha256) and evicted least-recently-used first whenever
+    the directory grows past max_bytes. Several processes may share one
+    directory: every save re-reads the index under a file lock and merges
+    this process's changes into it.
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(directory, INDEX_FILENAME)
+        self.lock_path = os.path.join(directory, LOCK_FILENAME)
+        self._lock = threading.Lock()
+        self._dirty = False
+        # Digests forgotten since the last save, so the merge doesn't restore them
+        self._removed = set()
+        # Identity of the index file as of our last load or save
+        self._stamp = None
+        os.makedirs(directory, exist_ok=True)
+        self._index = self._load()
+
+    # -------------------------
+    # Persistence
+    # -------------------------
+    def _indexStamp(self):
+        try:
+            stat = os.stat(self.index_path)
+        except FileNotFoundError:
+            return None
+        # Saves replace the file, so the inode changes even within one mtime tick
+        return stat.st_ino, stat.st_mtime_ns
+
+    def _load(self):
+        # Stamped before reading: a save racing the read only causes a reload
+        self._stamp = self._indexStamp()
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            index = {}
+
+        index.setdefault("topics", {})
+        index.setdefault("photos", {})
+        index.setdefault("files", {})
+        return index
+
+    def _save(self):
+        """Merge into the index on disk, evict over the merged total and write."""
+        with open(self.lock_path, "w") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+            self._index = self._merge(self._load())
+            self._evict()
+            temp_path = f"{self.index_path}.{os.getpid()}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(self._index, f)
+            os.replace(temp_path, self.index_path)
+            self._stamp = self._indexStamp()
+
+        self._removed.clear()
+        self._dirty = False
+
+    def _merge(self, disk):
+        files = {
+            digest: entry
+            for digest, entry in disk["files"].items()
+            if digest not in self._removed
+        }
+        for digest, entry in self._index["files"].items():
+            current = files.get(digest)
+            if current is None:
+                # Missing files were evicted by another process since we loaded
+                path = os.path.join(self.directory, entry["file"])
+                if os.path.exists(path):
+                    files[digest] = entry
+            elif entry["last_used"] > current["last_used"]:
+                files[digest] = entry
+
+        photos = {**disk["photos"], **self._index["photos"]}
+        photos = {k: v for k, v in photos.items() if v in files}
+        topics = {**disk["topics"], **self._index["topics"]}
+        topics = {k: v for k, v in topics.items() if v in photos}
+        return {"topics": topics, "photos": photos, "files": files}
+
+    def flush(self):
+        """Persist recency updates from cache hits."""
+        with self._lock:
+            if self._dirty:
+                self._save()
+
+    # -------------------------
+    # Lookup
+    # -------------------------
+    def _resolve(self, photo_id):
+        digest = self._index["photos"].get(str(photo_id))
+        entry = self._index["files"].get(digest) if digest else None
+        if entry is None:
+            return None
+
+        path = os.path.join(self.directory, entry["file"])
+        if not os.path.exists(path):
+            self._forget(digest)
+            self._dirty = True
+            return None
+
+        entry["last_used"] = time.time()
+        self._dirty = True
+        return path
+
+    def _refresh(self):
+        """Pick up entries other processes saved since we last loaded or saved."""
+        if self._indexStamp() != self._stamp:
+            self._index = self._merge(self._load())
+
+    def lookupTopic(self, topic):
+        """Return the cached file for topic, or None."""
+        key = normalizeTopic(topic)
+        with self._lock:
+            if key not in self._index["topics"]:
+                self._refresh()
+            photo_id = self._index["topics"].get(key)
+            if photo_id is None:
+                return None
+            return self._resolve(photo_id)
+
+    def lookupPhoto(self, topic, photo_id):
+        """Return the cached file for a Pexels id and remember it for topic."""
+        with self._lock:
+            if str(photo_id) not in self._index["photos"]:
+                self._refresh()
+            path = self._resolve(photo_id)
+            if path is not None:
+                self._index["topics"][normalizeTopic(topic)] = str(photo_id)
+            return path
+
+    # -------------------------
+    # Insert / Evict
+    # -------------------------
+    def put(self, topic, photo_id, content, extension=".jpg"):
+        """Store downloaded bytes under their sha256 and index them. Returns the path."""
+        digest = hashlib.sha256(content).hexdigest()
+        filename = f"{digest}{extension}"
+        path = os.path.join(self.directory, filename)
+
+        with self._lock:
+            if not os.path.exists(path):
+                temp_path = f"{path}.{os.getpid()}.part"
+                with open(temp_path, "wb") as f:
+                    f.write(content)
+                os.replace(temp_path, path)
+
+            self._index["files"][digest] = {
+                "file": filename,
+                "size": len(content),
+                "last_used": time.time(),
+            }
+            self._index["photos"][str(photo_id)] = digest
+            self._index["topics"][normalizeTopic(topic)] = str(photo_id)
+            self._save()
+
+        return path
+
+    def _forget(self, digest):
+        self._removed.add(digest)
+        self._index["files"].pop(digest, None)
+        dead_ids = [k for k, v in self._index["photos"].items() if v == digest]
+        for photo_id in dead_ids:
+            del self._index["photos"][photo_id]
+        dead_topics = set(dead_ids)
+        for topic in [k for k, v in self._index["topics"].items() if v in dead_topics]:
+            del self._index["topics"][topic]
+
+    def _evict(self):
+        files = self._index["files"]
+        total = sum(entry["size"] for entry in files.values())
+        if total <= self.max_bytes:
+            return
+
+        # Oldest first; the entry just inserted is the newest so it survives
+        for digest, entry in sorted(files.items(), key=lambda x: x[1]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, entry["file"]))
+            except FileNotFoundError:
+                pass
+            total -= entry["size"]
+            self._forget(digest)
+            print(f"Evicted cached photo {entry['file']}")
+
+    def totalBytes(self):
+        with self._lock:
+            return sum(entry["size"] for entry in self._index["files"].values())
@@ -0,0 +1,239 @@
+import base64
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from typing import List, Optional, Tuple
+
+# Configuration
+PROJECTS_DB_PATH = os.getenv("PROJECTS_DB_PATH", "Output/projects.db")
+
+# Fields the list view can ask for, mapped to their indexed columns
+LIST_FIELDS = {
+    "id": "id",
+    "title": "title",
+    "thumbnailUrl": "thumbnail_url",
+    "lastEdited": "last_edited",
+    "createdAt": "created_at",
+}
+
+# Rendered-output URLs kept in their own columns so garbage collection can
+# list them without parsing every blob, mapped to their JSON paths
+OUTPUT_COLUMNS = {
+    "video_url": "$.videoUrl",
+    "preview_url": "$.previewUrl",
+    "video_variants": "$.videoVariants",
+}
+
+_local = threading.local()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    id TEXT PRIMARY KEY,
+    title TEXT,
+    thumbnail_url TEXT,
+    last_edited TEXT NOT NULL DEFAULT '',
+    created_at TEXT,
+    video_url TEXT,
+    preview_url TEXT,
+    video_variants TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_projects_last_edited
+    ON projects (last_edited DESC, id DESC);
+"""
+
+# Created after migrate_schema, since older databases lack the output columns
+OUTPUT_INDEX = """
+CREATE INDEX IF NOT EXISTS idx_projects_outputs
+    ON projects (video_url, preview_url, video_variants);
+"""
+
+
+# ====================
+# Connection
+# ====================
+
+
+def get_connection() -> sqlite3.Connection:
+    """One connection per thread; WAL lets several uvicorn workers share the file"""
+    conn = getattr(_local, "conn", None)
+    if conn is None or getattr(_local, "path", None) != PROJECTS_DB_PATH:
+        directory = os.path.dirname(PROJECTS_DB_PATH)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(PROJECTS_DB_PATH, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        migrate_schema(conn)
+        _local.conn = conn
+        _local.path = PROJECTS_DB_PATH
+    return conn
+
+
+def migrate_schema(conn: sqlite3.Connection) -> None:
+    """Add the output columns to databases created before they existed"""
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(projects)")}
+    missing = [column for column in OUTPUT_COLUMNS if column not in existing]
+    with conn:
+        for column in missing:
+            conn.execute(f"ALTER TABLE projects ADD COLUMN {column} TEXT")
+        if missing:
+            conn.execute(
+                "UPDATE projects SET "
+                + ", ".join(
+                    f"{column} = json_extract(data, '{path}')"
+                    for column, path in OUTPUT_COLUMNS.items()
+                )
+            )
+    conn.executescript(OUTPUT_INDEX)
+
+
+# ====================
+# Cursor Encoding
+# ====================
+
+
+def encode_cursor(last_edited: str, project_id: str) -> str:
+    raw = json.dumps([last_edited, project_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    try:
+        last_edited, project_id = json.loads(base64.urlsafe_b64decode(cursor))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    return last_edited, project_id
+
+
+# ====================
+# Project CRUD
+# ====================
+
+
+def save_project(project_data: dict) -> str:
+    """Insert or replace a project"""
+    project_id = project_data.get("id")
+    if not project_id:
+        project_id = str(uuid.uuid4())
+        project_data["id"] = project_id
+
+    conn = get_connection()
+    with conn:
+        conn.execute(
+            """
+            INSERT INTO projects (
+                id, title, thumbnail_url, last_edited, created_at,
+                video_url, preview_url, video_variants, data
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                title = excluded.title,
+                thumbnail_url = excluded.thumbnail_url,
+                last_edited = excluded.last_edited,
+                created_at = excluded.created_at,
+                video_url = excluded.video_url,
+                preview_url = excluded.preview_url,
+                video_variants = excluded.video_variants,
+                data = excluded.data
+            """,
+            (
+                project_id,
+                project_data.get("title", "Untitled Project"),
+                project_data.get("thumbnailUrl"),
+                project_data.get("lastEdited") or "",
+                project_data.get("createdAt"),
+                project_data.get("videoUrl"),
+                project_data.get("previewUrl"),
+                json.dumps(project_data.get("videoVariants") or {}),
+                json.dumps(project_data),
+            ),
+        )
+    return project_id
+
+
+def get_project_by_id(project_id: str) -> Optional[dict]:
+    row = (
+        get_connection()
+        .execute("SELECT data FROM projects WHERE id = ?", (project_id,))
+        .fetchone()
+    )
+    return json.loads(row[0]) if row else None
+
+
+def get_all_projects() -> List[dict]:
+    rows = get_connection().execute(
+        "SELECT data FROM projects ORDER BY last_edited DESC, id DESC"
+    )
+    return [json.loads(row[0]) for row in rows]
+
+
+def get_projects_with_active_jobs() -> List[dict]:
+    """Projects whose job is queued or running"""
+    rows = get_connection().execute(
+        "SELECT data FROM projects"
+        " WHERE json_extract(data, '$.job.status') IN ('queued', 'running')"
+    )
+    return [json.loads(row[0]) for row in rows]
+
+
+def get_output_urls() -> List[str]:
+    """
+    Every rendered-output URL some project links to (videoUrl, previewUrl and
+    the videoVariants values). Answered from the output index alone.
+    """
+    rows = get_connection().execute(
+        "SELECT video_url, preview_url, video_variants FROM projects"
+    )
+    urls = []
+    for video_url, preview_url, video_variants in rows:
+        urls += [video_url, preview_url]
+        if video_variants:
+            urls.extend(json.loads(video_variants).values())
+    return [url for url in urls if url]
+
+
+def list_projects(
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    fields: Optional[List[str]] = None,
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    Page through projects by lastEdited (most recent first) using the index.
+    Only the requested list-view columns are read; the JSON blob is never parsed.
+    Returns (projects, next_cursor).
+    """
+    fields = fields or list(LIST_FIELDS)
+    unknown = [field for field in fields if field not in LIST_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+    # id and lastEdited are always read to build the next cursor
+    columns = ["id", "last_edited"] + [
+        LIST_FIELDS[field] for field in fields if field not in ("id", "lastEdited")
+    ]
+    query = f"SELECT {', '.join(columns)} FROM projects"
+    params: list = []
+    if cursor:
+        last_edited, project_id = decode_cursor(cursor)
+        query += " WHERE (last_edited, id) < (?, ?)"
+        params += [last_edited, project_id]
+    query += " ORDER BY last_edited DESC, id DESC LIMIT ?"
+    params.append(limit + 1)
+
+    rows = get_connection().execute(query, params).fetchall()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][1], rows[-1][0])
+
+    column_to_field = {column: field for field, column in LIST_FIELDS.items()}
+    projects = []
+    for row in rows:
+        values = {column_to_field[column]: value for column, value in zip(columns, row)}
+        projects.append({field: values[field] for field in fields})
+    return projects, next_cursor
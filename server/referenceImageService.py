@@ -0,0 +1,152 @@
+import asyncio
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image, ImageOps
+import metrics
+
+# Configuration
+REFERENCE_DERIVED_FOLDER = "Input/reference_images/derived"
+REFERENCE_WORKERS = int(os.getenv("REFERENCE_WORKERS", "2"))
+
+# Derivative name -> bounding box; images are scaled down to fit, never up
+REFERENCE_SIZES: Dict[str, Tuple[int, int]] = {
+    "render": (1080, 1920),
+    "thumbnail": (320, 320),
+}
+REFERENCE_QUALITY = 90
+
+# EXIF orientations that rotate the image by 90 or 270 degrees
+EXIF_ORIENTATION = 0x0112
+TRANSPOSED_ORIENTATIONS = {5, 6, 7, 8}
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+# ====================
+# Preprocessing
+# ====================
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def derived_filename(digest: str, variant: str) -> str:
+    return f"{digest}_{variant}.jpg"
+
+
+def fit_within(size: Tuple[int, int], box: Tuple[int, int]) -> Tuple[int, int]:
+    scale = min(1.0, box[0] / size[0], box[1] / size[1])
+    return max(1, round(size[0] * scale)), max(1, round(size[1] * scale))
+
+
+def preprocess_image(image_path: str) -> dict:
+    """
+    Decode an uploaded image once, apply its EXIF orientation and write a
+    JPEG derivative per REFERENCE_SIZES entry. Derivatives are named by the
+    original's sha256, so re-uploads of the same file are not processed
+    again. Returns the oriented dimensions, digest and derivative files.
+    """
+    with metrics.span("reference_image"):
+        return _preprocess_image(image_path)
+
+
+def _preprocess_image(image_path: str) -> dict:
+    os.makedirs(REFERENCE_DERIVED_FOLDER, exist_ok=True)
+    digest = file_sha256(image_path)
+
+    with Image.open(image_path) as source:
+        width, height = source.size
+        orientation = source.getexif().get(EXIF_ORIENTATION)
+        transposed = orientation in TRANSPOSED_ORIENTATIONS
+        if transposed:
+            width, height = height, width
+        info = {"width": width, "height": height, "sha256": digest, "derived": {}}
+
+        paths = {
+            variant: os.path.join(
+                REFERENCE_DERIVED_FOLDER, derived_filename(digest, variant)
+            )
+            for variant in REFERENCE_SIZES
+        }
+        image = None
+        if not all(os.path.exists(path) for path in paths.values()):
+            # Let the JPEG decoder downsample toward the largest derivative
+            box = max(REFERENCE_SIZES.values(), key=lambda box: box[0] * box[1])
+            if transposed:
+                box = (box[1], box[0])
+            source.draft("RGB", fit_within(source.size, box))
+            image = ImageOps.exif_transpose(source)
+            if image.mode in ("RGBA", "LA", "P"):
+                image = image.convert("RGBA")
+                background = Image.new("RGB", image.size, (0, 0, 0))
+                background.paste(image, mask=image.getchannel("A"))
+                image = background
+            image = image.convert("RGB")
+
+    for variant, box in REFERENCE_SIZES.items():
+        path = paths[variant]
+        if image is not None and not os.path.exists(path):
+            resized = image.resize(fit_within(image.size, box), Image.LANCZOS)
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            resized.save(temp_path, "JPEG", quality=REFERENCE_QUALITY)
+            os.replace(temp_path, path)
+
+        with Image.open(path) as derived:
+            info["derived"][variant] = {
+                "filename": os.path.basename(path),
+                "path": path,
+                "width": derived.width,
+                "height": derived.height,
+            }
+
+    return info
+
+
+# ====================
+# Worker Pool
+# ====================
+
+
+def get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=REFERENCE_WORKERS)
+    return _executor
+
+
+def shutdown_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+async def preprocess_images(image_paths: List[str]) -> List[Optional[dict]]:
+    """
+    Preprocess uploads across the worker pool without blocking the event
+    loop. Images that fail to decode map to None.
+    """
+    loop = asyncio.get_running_loop()
+    results = await asyncio.gather(
+        *(
+            loop.run_in_executor(get_executor(), preprocess_image, path)
+            for path in image_paths
+        ),
+        return_exceptions=True,
+    )
+
+    infos = []
+    for path, result in zip(image_paths, results):
+        if isinstance(result, Exception):
+            print(f"Error preprocessing reference image {path}: {str(result)}")
+            result = None
+        infos.append(result)
+    return infos
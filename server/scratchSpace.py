@@ -0,0 +1,139 @@
+import os
+import shutil
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Iterable, List, Tuple
+
+# Configuration
+# Point SCRATCH_DIR at a tmpfs (e.g. /dev/shm/evidai) for fast intermediate I/O
+SCRATCH_DIR = os.getenv("SCRATCH_DIR", "Output/scratch")
+OUTPUT_FOLDER = "Output"
+OUTPUT_QUOTA_BYTES = int(os.getenv("OUTPUT_QUOTA_BYTES", str(50 * 1024**3)))
+MIN_FREE_BYTES = int(os.getenv("MIN_FREE_BYTES", str(2 * 1024**3)))
+
+# Files younger than this may belong to a render in progress
+MIN_AGE_SECONDS = 15 * 60
+# Leftover *.tmp / *_TEMP* files older than this are from crashed writers
+TEMP_MAX_AGE_SECONDS = 6 * 3600
+
+# Regenerable intermediates, evicted oldest first when over quota
+INTERMEDIATE_FOLDERS = ["Output/baked", "Output/segment_cache", "Output/branding"]
+OUTPUT_VIDEO_PREFIXES = ("result_", "preview_")
+
+
+# ====================
+# Per-job Scratch Directories
+# ====================
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+@contextmanager
+def job_dir(name: str):
+    """
+    Yield a fresh directory under SCRATCH_DIR for one job's intermediate
+    files and remove it afterwards, whether or not the job succeeded.
+    """
+    path = os.path.join(SCRATCH_DIR, f"{name}-{os.getpid()}-{uuid.uuid4().hex[:8]}")
+    os.makedirs(path)
+    try:
+        yield path
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def sweep_scratch() -> int:
+    """Remove scratch directories left behind by processes that have exited"""
+    if not os.path.isdir(SCRATCH_DIR):
+        return 0
+
+    removed = 0
+    for entry in os.scandir(SCRATCH_DIR):
+        # Directories are named <name>-<pid>-<random> by job_dir
+        parts = entry.name.rsplit("-", 2)
+        if len(parts) != 3 or not parts[1].isdigit() or not entry.is_dir():
+            continue
+        if not _pid_alive(int(parts[1])):
+            shutil.rmtree(entry.path, ignore_errors=True)
+            removed += 1
+    return removed
+
+
+# ====================
+# Output Garbage Collection
+# ====================
+
+
+def _files(folder: str) -> Iterable[os.DirEntry]:
+    if not os.path.isdir(folder):
+        return
+    for entry in os.scandir(folder):
+        if entry.is_dir(follow_symlinks=False):
+            yield from _files(entry.path)
+        elif entry.is_file(follow_symlinks=False):
+            yield entry
+
+
+def _is_temp(name: str) -> bool:
+    return ".tmp" in name or "_TEMP" in name or name.endswith(".part")
+
+
+def collect_garbage(keep: Iterable[str] = ()) -> int:
+    """
+    Delete crashed-writer temp files, then, while OUTPUT_FOLDER is over
+    OUTPUT_QUOTA_BYTES or the disk has less than MIN_FREE_BYTES free, the
+    least recently used intermediates and output videos. Paths in keep
+    (videos a project still links to) are never deleted. Returns bytes freed.
+    """
+    keep = {os.path.abspath(path) for path in keep}
+    now = time.time()
+    freed = 0
+
+    usage = 0
+    candidates: List[Tuple[float, int, str]] = []
+    for entry in _files(OUTPUT_FOLDER):
+        stat = entry.stat(follow_symlinks=False)
+        age = now - stat.st_mtime
+        if _is_temp(entry.name) and age > TEMP_MAX_AGE_SECONDS:
+            freed += _remove(entry.path, stat.st_size)
+            continue
+
+        usage += stat.st_size
+        if age < MIN_AGE_SECONDS or os.path.abspath(entry.path) in keep:
+            continue
+        parent = os.path.dirname(entry.path)
+        is_video = parent == OUTPUT_FOLDER and entry.name.endswith(".mp4")
+        if is_video and entry.name.startswith(OUTPUT_VIDEO_PREFIXES):
+            candidates.append((stat.st_mtime, stat.st_size, entry.path))
+        elif any(entry.path.startswith(f"{d}/") for d in INTERMEDIATE_FOLDERS):
+            candidates.append((stat.st_mtime, stat.st_size, entry.path))
+
+    free = shutil.disk_usage(OUTPUT_FOLDER).free
+    needed = max(usage - OUTPUT_QUOTA_BYTES, MIN_FREE_BYTES - free)
+    for _, size, path in sorted(candidates):
+        if needed <= 0:
+            break
+        removed = _remove(path, size)
+        needed -= removed
+        freed += removed
+
+    if freed:
+        print(f"Garbage collected {freed / 1024 / 1024:.1f}MB from {OUTPUT_FOLDER}")
+    return freed
+
+
+def _remove(path: str, size: int) -> int:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        return 0
+    return size
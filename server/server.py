@@ -1,46 +1,106 @@
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException
+from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Query, Request, Body
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, Response
+import asyncio
+import json
 import os
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
 from dotenv import load_dotenv
 from datetime import datetime
 import uuid
-from moviepy import VideoFileClip
-from PIL import Image
-from typing import List, Optional
+from typing import Dict, List, Optional
+import jobPipeline
+import metrics
+import projectStore
+import referenceImageService
+import scratchSpace
+import thumbnailService
 
 load_dotenv()
 
-# app instance
-app = FastAPI()
 
-# Configure CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["http://localhost:3000", "http://127.0.0.1:3000"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Scratch and jobs left by a previous server process that crashed or was killed
+    scratchSpace.sweep_scratch()
+    fail_interrupted_jobs()
+    yield
+    jobPipeline.shutdown_executor()
+    referenceImageService.shutdown_executor()
+    thumbnailService.shutdown_executor()
+
+
+# app instance
+app = FastAPI(lifespan=lifespan)
 
 # Configuration
 UPLOAD_FOLDER = "Input"
 REFERENCE_IMAGES_FOLDER = "Input/reference_images"
+BATCH_INPUT_FOLDER = "Input/batch"
 OUTPUT_FOLDER = "Output"
-THUMBNAILS_FOLDER = "Output/thumbnails"
+THUMBNAILS_FOLDER = thumbnailService.THUMBNAILS_FOLDER
+REFERENCE_DERIVED_FOLDER = referenceImageService.REFERENCE_DERIVED_FOLDER
+THUMBNAIL_CACHE_CONTROL = "public, max-age=31536000, immutable"
+VIDEO_CACHE_CONTROL = "public, max-age=0, must-revalidate"
 ALLOWED_AUDIO_EXTENSIONS = {"mp3", "wav", "m4a"}
 ALLOWED_IMAGE_EXTENSIONS = {"png", "jpg", "jpeg", "gif", "webp"}
 MAX_AUDIO_SIZE = 100 * 1024 * 1024  # 100MB
+MAX_BATCH_SIZE = 500
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1MB
+# Room for reference images and form fields alongside the audio file
+MAX_FORM_OVERHEAD = 50 * 1024 * 1024  # 50MB
+MAX_BATCH_UPLOAD_SIZE = int(os.getenv("MAX_BATCH_UPLOAD_SIZE", "1073741824"))  # 1GB
+# Upload routes and the largest request body each accepts
+MAX_REQUEST_SIZES = {
+    "/api/create": MAX_AUDIO_SIZE + MAX_FORM_OVERHEAD,
+    "/api/batch": MAX_BATCH_UPLOAD_SIZE,
+}
 
 # Ensure directories exist
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(REFERENCE_IMAGES_FOLDER, exist_ok=True)
+os.makedirs(BATCH_INPUT_FOLDER, exist_ok=True)
 os.makedirs(OUTPUT_FOLDER, exist_ok=True)
 os.makedirs(THUMBNAILS_FOLDER, exist_ok=True)
+os.makedirs(REFERENCE_DERIVED_FOLDER, exist_ok=True)
+
+# Strong references to running pipeline tasks so they aren't garbage collected
+job_tasks = set()
+
+
+@app.middleware("http")
+async def limit_upload_size(request: Request, call_next):
+    """
+    Refuse oversized uploads from their Content-Length, before the multipart
+    body is received and spooled. Bodies without a declared length are
+    refused too, since their size is only known once they are spooled.
+    """
+    max_size = MAX_REQUEST_SIZES.get(request.url.path)
+    if max_size is None or request.method != "POST":
+        return await call_next(request)
+
+    content_length = request.headers.get("content-length")
+    if content_length is None:
+        return JSONResponse(
+            status_code=411, content={"detail": "Content-Length required"}
+        )
+    if not content_length.isdigit() or int(content_length) > max_size:
+        return JSONResponse(
+            status_code=413,
+            content={"detail": f"Upload exceeds {max_size / 1024 / 1024:.0f}MB limit"},
+        )
+    return await call_next(request)
+
 
-# In-memory storage to simulate MongoDB
-# Structure: {project_id: {project_data}}
-projects_db = {}
+# Configure CORS; added last so it also wraps responses from the size limit
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["http://localhost:3000", "http://127.0.0.1:3000"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
 
 
 def secure_filename(filename: str) -> str:
@@ -62,30 +122,111 @@ def allowed_image_file(filename: str) -> bool:
     )
 
 
+def audio_too_large(file_size: int) -> HTTPException:
+    return HTTPException(
+        status_code=400,
+        detail=f"Audio file exceeds 100MB limit. Current size: {file_size / 1024 / 1024:.2f}MB",
+    )
+
+
+async def save_upload(
+    upload: UploadFile,
+    destination: str,
+    max_size: Optional[int] = None,
+    too_large=None,
+) -> int:
+    """
+    Stream an upload to disk in chunks without holding it in memory.
+    Blocking file I/O runs in a thread; the partial file is removed if the
+    upload goes over max_size (too_large builds the error) or fails.
+    """
+    size = 0
+    f = await asyncio.to_thread(open, destination, "wb")
+    try:
+        while chunk := await upload.read(UPLOAD_CHUNK_SIZE):
+            size += len(chunk)
+            if max_size is not None and size > max_size:
+                raise too_large(size)
+            await asyncio.to_thread(f.write, chunk)
+    except BaseException:
+        await asyncio.to_thread(f.close)
+        await asyncio.to_thread(os.remove, destination)
+        raise
+
+    await asyncio.to_thread(f.close)
+    return size
+
+
 # ====================
-# Dummy MongoDB Functions
+# Project Storage
 # ====================
 
 
 def save_project(project_data: dict) -> str:
-    """Save or update a project in the in-memory storage"""
-    project_id = project_data.get("id")
-    if not project_id:
-        project_id = str(uuid.uuid4())
-        project_data["id"] = project_id
-
-    projects_db[project_id] = project_data
-    return project_id
+    """Save or update a project in the SQLite project store"""
+    return projectStore.save_project(project_data)
 
 
 def get_all_projects() -> List[dict]:
-    """Get all projects from storage"""
-    return list(projects_db.values())
+    """Get all projects from storage, most recently edited first"""
+    return projectStore.get_all_projects()
 
 
 def get_project_by_id(project_id: str) -> Optional[dict]:
     """Get a single project by ID"""
-    return projects_db.get(project_id)
+    return projectStore.get_project_by_id(project_id)
+
+
+def new_project(
+    audio_path: str,
+    audio_size: int,
+    description: str,
+    timestamp: str,
+    reference_images: List[dict] = [],
+    title: str = "",
+    audio_name: str = "",
+) -> dict:
+    """Build the record for a newly uploaded project with a queued job"""
+    # Create project title from description or audio filename
+    project_title = title.strip() or description.strip() or audio_name
+    if not project_title:
+        project_title = "Untitled Project"
+
+    now = datetime.now().isoformat()
+    return {
+        "id": str(uuid.uuid4()),
+        "title": project_title,
+        "description": description,
+        "thumbnailUrl": None,
+        "videoUrl": None,
+        "videoVariants": {},
+        "audioFile": {
+            "filename": os.path.basename(audio_path),
+            "path": audio_path,
+            "size": audio_size,
+        },
+        "referenceImages": reference_images,
+        "createdAt": now,
+        "lastEdited": now,
+        "storyboard": {},
+        "agentHistory": [],
+        "timestamp": timestamp,
+        "job": jobPipeline.new_job(),
+    }
+
+
+def reference_image_entry(path: str, info: Optional[dict]) -> dict:
+    """Project referenceImages entry, with derivatives when preprocessing worked"""
+    entry = {"filename": os.path.basename(path), "path": path}
+    if info is None:
+        return entry
+
+    entry.update(width=info["width"], height=info["height"], sha256=info["sha256"])
+    entry["derived"] = {
+        variant: dict(derived, url=f"/api/reference-images/{derived['filename']}")
+        for variant, derived in info["derived"].items()
+    }
+    return entry
 
 
 # ====================
@@ -93,30 +234,139 @@ def get_project_by_id(project_id: str) -> Optional[dict]:
 # ====================
 
 
-def extract_video_thumbnail(video_path: str, project_id: str) -> Optional[str]:
-    """Extract first frame from video and save as thumbnail"""
+def thumbnail_url(filename: str) -> str:
+    """Versioned URL so clients can cache thumbnails indefinitely"""
+    path = os.path.join(THUMBNAILS_FOLDER, filename)
+    return f"/api/thumbnails/{filename}?v={int(os.path.getmtime(path))}"
+
+
+async def extract_video_thumbnail(video_path: str, project_id: str) -> dict:
+    """Extract the first frame once and save every thumbnail variant"""
     try:
         if not os.path.exists(video_path):
-            return None
+            return {}
+
+        variants = await thumbnailService.create_thumbnails(video_path, project_id)
+        return {name: thumbnail_url(filename) for name, filename in variants.items()}
+    except Exception as e:
+        print(f"Error extracting thumbnail: {str(e)}")
+        return {}
+
+
+def file_etag(path: str) -> str:
+    stat = os.stat(path)
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def not_modified(request: Request, path: str, etag: str) -> bool:
+    """Evaluate If-None-Match, falling back to If-Modified-Since"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return if_none_match.strip() == "*" or etag in if_none_match
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(os.path.getmtime(path)) <= since
+    return False
 
-        # Load video and get first frame
-        clip = VideoFileClip(video_path)
-        frame = clip.get_frame(0)  # Get frame at 0 seconds
 
-        # Convert numpy array to PIL Image
-        thumbnail_image = Image.fromarray(frame)
+# ====================
+# Background Jobs
+# ====================
+
+
+async def process_project(
+    project_id: str,
+    stages: List[str] = jobPipeline.STAGES,
+    draft: bool = False,
+    priority: int = jobPipeline.INTERACTIVE_PRIORITY,
+) -> None:
+    """Run the transcribe -> keywords -> photos -> render pipeline (or part of it)"""
+    try:
+        videos = await jobPipeline.run_job(
+            project_id, get_project_by_id, save_project, stages, draft, priority
+        )
+        if videos:
+            await publish_render(project_id, videos, draft)
+    finally:
+        await asyncio.to_thread(collect_output_garbage)
 
-        # Save thumbnail
-        thumbnail_filename = f"thumbnail_{project_id}.jpg"
-        thumbnail_path = os.path.join(THUMBNAILS_FOLDER, thumbnail_filename)
-        thumbnail_image.save(thumbnail_path, "JPEG", quality=85)
 
-        clip.close()
+def referenced_outputs() -> List[str]:
+    """Rendered videos that some project still links to"""
+    return [
+        os.path.join(OUTPUT_FOLDER, os.path.basename(url))
+        for url in projectStore.get_output_urls()
+    ]
 
-        return thumbnail_path
+
+def collect_output_garbage() -> None:
+    try:
+        scratchSpace.sweep_scratch()
+        scratchSpace.collect_garbage(keep=referenced_outputs())
     except Exception as e:
-        print(f"Error extracting thumbnail: {str(e)}")
-        return None
+        print(f"Error collecting output garbage: {str(e)}")
+
+
+async def publish_render(project_id: str, videos: Dict[str, str], draft: bool) -> None:
+    """
+    Point the project at a finished render. videos maps output profile names
+    to rendered files, main video first; every variant is listed in
+    videoVariants and the main one is also the videoUrl.
+    """
+    urls = {
+        name: f"/api/videos/{os.path.basename(path)}" for name, path in videos.items()
+    }
+    video_path = next(iter(videos.values()))
+    if draft:
+        project = get_project_by_id(project_id)
+        if project is not None:
+            project["previewUrl"] = next(iter(urls.values()))
+            save_project(project)
+        return
+
+    thumbnails = await extract_video_thumbnail(video_path, project_id)
+
+    project = get_project_by_id(project_id)
+    if project is None:
+        return
+    project["videoUrl"] = next(iter(urls.values()))
+    project["videoVariants"] = urls
+    if thumbnails:
+        project["thumbnailUrl"] = thumbnails["md.jpg"]
+        project["thumbnails"] = thumbnails
+    project["lastEdited"] = datetime.now().isoformat()
+    save_project(project)
+
+
+def fail_interrupted_jobs() -> None:
+    """Fail jobs whose server process died so their projects aren't stuck"""
+    for project in projectStore.get_projects_with_active_jobs():
+        if jobPipeline.job_orphaned(project["job"]):
+            jobPipeline.interrupt_job(project["job"])
+            save_project(project)
+            print(f"Job for project {project['id']} was interrupted")
+
+
+def start_job(
+    project_id: str,
+    stages: List[str] = jobPipeline.STAGES,
+    draft: bool = False,
+    priority: int = jobPipeline.INTERACTIVE_PRIORITY,
+) -> None:
+    task = asyncio.create_task(process_project(project_id, stages, draft, priority))
+    job_tasks.add(task)
+    metrics.set_gauge("evidai_queue_depth", len(job_tasks), queue="jobs")
+
+    def on_done(task: asyncio.Task) -> None:
+        job_tasks.discard(task)
+        metrics.set_gauge("evidai_queue_depth", len(job_tasks), queue="jobs")
+
+    task.add_done_callback(on_done)
 
 
 # ====================
@@ -129,29 +379,29 @@ async def home():
     return {"message": "Hello, World!"}
 
 
-@app.get("/api/projects")
-async def get_projects():
-    """Get all projects"""
-    try:
-        projects = get_all_projects()
+@app.get("/api/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Pipeline stage timings, cache hit/miss counters and queue depths (Prometheus)"""
+    text = await asyncio.to_thread(metrics.render)
+    return PlainTextResponse(text, media_type="text/plain; version=0.0.4")
 
-        # Format projects for list view
-        formatted_projects = []
-        for project in projects:
-            formatted_projects.append(
-                {
-                    "id": project.get("id"),
-                    "title": project.get("title", "Untitled Project"),
-                    "thumbnailUrl": project.get("thumbnailUrl"),
-                    "lastEdited": project.get("lastEdited"),
-                    "createdAt": project.get("createdAt"),
-                }
-            )
 
-        # Sort by last edited time (most recent first)
-        formatted_projects.sort(key=lambda x: x.get("lastEdited", ""), reverse=True)
+@app.get("/api/projects")
+async def get_projects(
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    """Get a page of projects, most recently edited first"""
+    try:
+        field_list = fields.split(",") if fields else None
+        projects, next_cursor = projectStore.list_projects(
+            limit=limit, cursor=cursor, fields=field_list
+        )
 
-        return {"projects": formatted_projects}
+        return {"projects": projects, "nextCursor": next_cursor}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print(f"Error fetching projects: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Server error: {e}")
@@ -174,14 +424,65 @@ async def get_project(project_id: str):
         raise HTTPException(status_code=500, detail=f"Server error: {e}")
 
 
+@app.get("/api/projects/{project_id}/job")
+async def get_project_job(project_id: str):
+    """Get pipeline status and per-stage progress for a project"""
+    project = get_project_by_id(project_id)
+
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    return {"projectId": project_id, "job": project.get("job")}
+
+
+@app.post("/api/projects/{project_id}/render")
+async def render_project(
+    project_id: str, storyboard: Optional[dict] = Body(None), draft: bool = False
+):
+    """
+    Re-render a project from its storyboard, re-encoding only changed segments.
+    draft=true renders a quick low-resolution preview to previewUrl and leaves
+    the published videoUrl alone.
+    """
+    project = get_project_by_id(project_id)
+
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    job = project.get("job") or {}
+    if job.get("status") in ("queued", "running"):
+        raise HTTPException(status_code=409, detail="Project is already rendering")
+
+    if storyboard is not None:
+        project["storyboard"] = storyboard
+    if not (project.get("storyboard") or {}).get("segments"):
+        raise HTTPException(
+            status_code=400, detail="Project has no storyboard to render"
+        )
+
+    project["job"] = jobPipeline.new_job(jobPipeline.RENDER_STAGES)
+    project["lastEdited"] = datetime.now().isoformat()
+    save_project(project)
+
+    start_job(project_id, jobPipeline.RENDER_STAGES, draft)
+
+    return {"projectId": project_id, "jobUrl": f"/api/projects/{project_id}/job"}
+
+
 @app.get("/api/thumbnails/{filename}")
-async def get_thumbnail(filename: str):
-    """Serve thumbnail images"""
+async def get_thumbnail(filename: str, request: Request):
+    """Serve thumbnail images with ETag revalidation and long-lived caching"""
     try:
-        thumbnail_path = os.path.join(THUMBNAILS_FOLDER, filename)
+        thumbnail_path = os.path.join(THUMBNAILS_FOLDER, secure_filename(filename))
         if not os.path.exists(thumbnail_path):
             raise HTTPException(status_code=404, detail="Thumbnail not found")
-        return FileResponse(thumbnail_path)
+
+        etag = file_etag(thumbnail_path)
+        headers = {"ETag": etag, "Cache-Control": THUMBNAIL_CACHE_CONTROL}
+        if etag in request.headers.get("if-none-match", ""):
+            return Response(status_code=304, headers=headers)
+
+        return FileResponse(thumbnail_path, headers=headers)
     except HTTPException:
         raise
     except Exception as e:
@@ -189,6 +490,40 @@ async def get_thumbnail(filename: str):
         raise HTTPException(status_code=404, detail="Thumbnail not found")
 
 
+@app.get("/api/reference-images/{filename}")
+async def get_reference_image(filename: str, request: Request):
+    """Serve preprocessed reference images; names are content hashes, cache forever"""
+    image_path = os.path.join(REFERENCE_DERIVED_FOLDER, secure_filename(filename))
+    if not os.path.isfile(image_path):
+        raise HTTPException(status_code=404, detail="Reference image not found")
+
+    etag = file_etag(image_path)
+    headers = {"ETag": etag, "Cache-Control": THUMBNAIL_CACHE_CONTROL}
+    if not_modified(request, image_path, etag):
+        return Response(status_code=304, headers=headers)
+
+    return FileResponse(image_path, media_type="image/jpeg", headers=headers)
+
+
+@app.get("/api/videos/{filename}")
+async def get_video(filename: str, request: Request):
+    """
+    Stream a rendered video. FileResponse answers Range requests with 206
+    (and honors If-Range), and uses the server's zero-copy pathsend when
+    available; ETag / Last-Modified revalidation returns 304.
+    """
+    video_path = os.path.join(OUTPUT_FOLDER, secure_filename(filename))
+    if not filename.endswith(".mp4") or not os.path.isfile(video_path):
+        raise HTTPException(status_code=404, detail="Video not found")
+
+    etag = file_etag(video_path)
+    headers = {"ETag": etag, "Cache-Control": VIDEO_CACHE_CONTROL}
+    if not_modified(request, video_path, etag):
+        return Response(status_code=304, headers=headers)
+
+    return FileResponse(video_path, media_type="video/mp4", headers=headers)
+
+
 @app.post("/api/create")
 async def create(
     videoDescription: str = Form(""),
@@ -207,26 +542,17 @@ async def create(
                 detail="Invalid audio file type. Allowed: MP3, WAV, M4A",
             )
 
-        # Check file size
-        file_content = await audioFile.read()
-        file_size = len(file_content)
-
-        if file_size > MAX_AUDIO_SIZE:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Audio file exceeds 100MB limit. Current size: {file_size / 1024 / 1024:.2f}MB",
-            )
-
-        # Save audio file
         timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
         audio_filename = secure_filename(audioFile.filename)
         audio_name, audio_ext = os.path.splitext(audio_filename)
         saved_audio_filename = f"{audio_name}_{timestamp}{audio_ext}"
         audio_path = os.path.join(UPLOAD_FOLDER, saved_audio_filename)
 
-        # Save audio file
-        with open(audio_path, "wb") as f:
-            f.write(file_content)
+        # Save audio file, enforcing the size limit while streaming
+        with metrics.span("upload_save"):
+            file_size = await save_upload(
+                audioFile, audio_path, MAX_AUDIO_SIZE, too_large=audio_too_large
+            )
 
         # Extract and save reference images
         saved_image_paths = []
@@ -245,63 +571,35 @@ async def create(
                 saved_image_filename = f"{image_name}_{timestamp}_{idx}{image_ext}"
                 image_path = os.path.join(REFERENCE_IMAGES_FOLDER, saved_image_filename)
 
-                # Read and save image file
-                image_content = await image_file.read()
-                with open(image_path, "wb") as f:
-                    f.write(image_content)
+                # Stream image file to disk
+                with metrics.span("upload_save"):
+                    await save_upload(image_file, image_path)
                 saved_image_paths.append(image_path)
 
-        # Generate unique project ID
-        project_id = str(uuid.uuid4())
-
-        # Create project title from description or audio filename
-        project_title = (
-            videoDescription.strip() if videoDescription.strip() else audio_name
-        )
-        if not project_title:
-            project_title = "Untitled Project"
-
-        # For now, video path will be set when video is generated
-        # Expected format: Output/result_{timestamp}.mp4
-        expected_video_path = os.path.join(OUTPUT_FOLDER, f"result_{timestamp}.mp4")
-        video_url = expected_video_path if os.path.exists(expected_video_path) else None
-
-        # Try to extract thumbnail if video exists
-        thumbnail_url = None
-        if video_url and os.path.exists(video_url):
-            thumbnail_path = extract_video_thumbnail(video_url, project_id)
-            if thumbnail_path:
-                # Return relative path for API access
-                thumbnail_filename = os.path.basename(thumbnail_path)
-                thumbnail_url = f"/api/thumbnails/{thumbnail_filename}"
+        # Decode, orient and downscale reference images once, off the event loop
+        image_infos = await referenceImageService.preprocess_images(saved_image_paths)
+        reference_images = [
+            reference_image_entry(path, info)
+            for path, info in zip(saved_image_paths, image_infos)
+        ]
 
         # Create project data
-        now = datetime.now().isoformat()
-        project_data = {
-            "id": project_id,
-            "title": project_title,
-            "description": videoDescription,
-            "thumbnailUrl": thumbnail_url,
-            "videoUrl": video_url,
-            "audioFile": {
-                "filename": saved_audio_filename,
-                "path": audio_path,
-                "size": file_size,
-            },
-            "referenceImages": [
-                {"filename": os.path.basename(path), "path": path}
-                for path in saved_image_paths
-            ],
-            "createdAt": now,
-            "lastEdited": now,
-            "storyboard": {},
-            "agentHistory": [],
-            "timestamp": timestamp,
-        }
+        project_data = new_project(
+            audio_path,
+            file_size,
+            videoDescription,
+            timestamp,
+            reference_images,
+            audio_name=audio_name,
+        )
+        project_id = project_data["id"]
 
         # Save project to storage
         save_project(project_data)
 
+        # Queue transcription, keyword extraction and rendering in the background
+        start_job(project_id)
+
         # Prepare response data
         response_data = {
             "message": "Video creation request received successfully!",
@@ -312,11 +610,9 @@ async def create(
                 "path": audio_path,
                 "size": file_size,
             },
-            "referenceImages": [
-                {"filename": os.path.basename(path), "path": path}
-                for path in saved_image_paths
-            ],
+            "referenceImages": reference_images,
             "timestamp": timestamp,
+            "jobUrl": f"/api/projects/{project_id}/job",
         }
 
         print("Video creation request received:")
@@ -334,6 +630,146 @@ async def create(
         raise HTTPException(status_code=500, detail=f"Server error: {e}")
 
 
+@app.post("/api/batch")
+async def create_batch(
+    audioFiles: List[UploadFile] = File(default=[]),
+    manifest: Optional[str] = Form(None),
+    priority: int = Form(jobPipeline.BATCH_PRIORITY),
+):
+    """
+    Create many projects at once. Every uploaded audio file becomes a project;
+    manifest is an optional JSON list of {"audioFile", "title", "description"}
+    entries. An entry's audioFile names one of the uploads, or else a file
+    already placed in BATCH_INPUT_FOLDER on the server so bulk runs need not
+    upload every narration. Jobs are queued at the given priority and run
+    through the per-stage schedulers alongside interactive jobs.
+    """
+    # Batch work never outranks interactive jobs
+    priority = max(priority, jobPipeline.INTERACTIVE_PRIORITY)
+
+    try:
+        try:
+            entries = json.loads(manifest) if manifest else []
+        except json.JSONDecodeError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid manifest: {e}")
+        if not isinstance(entries, list) or not all(
+            isinstance(entry, dict) and entry.get("audioFile") for entry in entries
+        ):
+            raise HTTPException(
+                status_code=400,
+                detail="Manifest must be a list of objects with an audioFile",
+            )
+
+        # Manifest entries refer to uploads by name, so names must be unique
+        uploads = {}
+        for upload in audioFiles:
+            if not upload.filename:
+                continue
+            filename = secure_filename(upload.filename)
+            if filename in uploads:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Duplicate audio file in batch: {filename}",
+                )
+            uploads[filename] = upload
+        listed = {secure_filename(entry["audioFile"]) for entry in entries}
+        entries += [{"audioFile": name} for name in uploads if name not in listed]
+
+        if not entries:
+            raise HTTPException(status_code=400, detail="No audio files in batch")
+        if len(entries) > MAX_BATCH_SIZE:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Batch exceeds {MAX_BATCH_SIZE} audio files",
+            )
+
+        # Validate everything before writing anything
+        for entry in entries:
+            filename = secure_filename(entry["audioFile"])
+            if not allowed_audio_file(filename):
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Invalid audio file type: {filename}",
+                )
+            if filename not in uploads and not os.path.isfile(
+                os.path.join(BATCH_INPUT_FOLDER, filename)
+            ):
+                raise HTTPException(
+                    status_code=400, detail=f"Audio file not found: {filename}"
+                )
+
+        batch_timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
+
+        # Save every upload once before creating any project, so a failed
+        # upload leaves nothing behind and entries naming the same upload
+        # share its saved file
+        saved = {}
+        try:
+            for filename, upload in uploads.items():
+                audio_name, audio_ext = os.path.splitext(filename)
+                audio_path = os.path.join(
+                    UPLOAD_FOLDER, f"{audio_name}_{batch_timestamp}{audio_ext}"
+                )
+                with metrics.span("upload_save"):
+                    file_size = await save_upload(
+                        upload, audio_path, MAX_AUDIO_SIZE, too_large=audio_too_large
+                    )
+                saved[filename] = (audio_path, file_size)
+        except BaseException:
+            for audio_path, _ in saved.values():
+                await asyncio.to_thread(os.remove, audio_path)
+            raise
+
+        projects = []
+        for idx, entry in enumerate(entries):
+            # Suffixed so projects of one batch never share output filenames
+            timestamp = f"{batch_timestamp}_{idx}"
+            filename = secure_filename(entry["audioFile"])
+            if filename in saved:
+                audio_path, file_size = saved[filename]
+            else:
+                audio_path = os.path.join(BATCH_INPUT_FOLDER, filename)
+                file_size = os.path.getsize(audio_path)
+
+            projects.append(
+                new_project(
+                    audio_path,
+                    file_size,
+                    str(entry.get("description") or ""),
+                    timestamp,
+                    title=str(entry.get("title") or ""),
+                    audio_name=os.path.splitext(filename)[0],
+                )
+            )
+
+        for project_data in projects:
+            save_project(project_data)
+        for project_data in projects:
+            start_job(project_data["id"], priority=priority)
+
+        print(f"Batch of {len(projects)} projects queued at priority {priority}")
+
+        return {
+            "message": f"Queued {len(projects)} projects",
+            "priority": priority,
+            "projects": [
+                {
+                    "projectId": project_data["id"],
+                    "title": project_data["title"],
+                    "audioFile": project_data["audioFile"],
+                    "jobUrl": f"/api/projects/{project_data['id']}/job",
+                }
+                for project_data in projects
+            ],
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error processing batch request: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Server error: {e}")
+
+
 if __name__ == "__main__":
     import uvicorn
 
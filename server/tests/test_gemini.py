@@ -0,0 +1,111 @@
+import json
+
+import pytest
+
+import benchmark
+import gemini
+import metrics
+from jsonKeywordExtractor import keywordsToTopics
+
+
+def makeSegments():
+    return [
+        {"text": "Rockets launch from the desert", "keywords": ["rocket", "desert"]},
+        {"text": "Coffee grows on the mountain", "keywords": ["coffee", "mountain"]},
+        {"text": "Rockets launch from the desert", "keywords": ["rocket", "desert"]},
+    ]
+
+
+def keywordTopics():
+    return [segment["topic"] for segment in keywordsToTopics(makeSegments())]
+
+
+@pytest.fixture
+def standIn(monkeypatch, tmp_path):
+    """
+    Point gemini at benchmark's stand-in server with a fresh topic cache and
+    metrics directory.
+    Returns a function that starts the server and gives back the list of
+    request bodies it receives.
+    """
+    servers = []
+    monkeypatch.setattr(gemini, "GEMINI_API_KEY", "test-key")
+    monkeypatch.setattr(gemini, "TOPIC_CACHE_PATH", str(tmp_path / "topics.json"))
+    monkeypatch.setattr(gemini, "_client", None)
+    monkeypatch.setattr(metrics, "METRICS_DIR", str(tmp_path / "metrics"))
+
+    def start(answer=benchmark.standInTopics, latency=0, timeout=2.0):
+        requests = []
+
+        def recordingAnswer(body):
+            requests.append(body)
+            return answer(body)
+
+        monkeypatch.setattr(benchmark, "standInTopics", recordingAnswer)
+        server = benchmark.startStandInServer((8, 8), latency)
+        servers.append(server)
+        monkeypatch.setattr(
+            gemini, "GEMINI_BASE_URL", f"http://127.0.0.1:{server.server_port}"
+        )
+        monkeypatch.setattr(gemini, "TOPIC_TIMEOUT", timeout)
+        return requests
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_uncached_segments_share_one_request(standIn):
+    requests = standIn()
+    segments = gemini.generateTopics(makeSegments())
+
+    assert [segment["topic"] for segment in segments] == [
+        "Rockets launch",
+        "Coffee grows",
+        "Rockets launch",
+    ]
+    # One request, and the repeated text is only sent once
+    assert len(requests) == 1
+    prompt = requests[0]["contents"][0]["parts"][0]["text"]
+    assert len(json.loads(prompt[prompt.index("[") :])) == 2
+
+
+def test_rerun_is_served_from_cache(standIn):
+    requests = standIn()
+    gemini.generateTopics(makeSegments())
+    segments = gemini.generateTopics(makeSegments())
+
+    assert len(requests) == 1
+    assert [segment["topic"] for segment in segments] == [
+        "Rockets launch",
+        "Coffee grows",
+        "Rockets launch",
+    ]
+
+
+def test_bad_reply_falls_back_to_keyword_topics(standIn):
+    def badReply(body):
+        return {
+            "candidates": [
+                {
+                    "content": {"role": "model", "parts": [{"text": "not json"}]},
+                    "finishReason": "STOP",
+                }
+            ]
+        }
+
+    requests = standIn(answer=badReply)
+    segments = gemini.generateTopics(makeSegments())
+
+    assert len(requests) == 1
+    assert [segment["topic"] for segment in segments] == keywordTopics()
+    assert gemini.loadTopicCache() == {}
+
+
+def test_timeout_falls_back_to_keyword_topics(standIn):
+    standIn(latency=3, timeout=0.5)
+    segments = gemini.generateTopics(makeSegments())
+
+    assert [segment["topic"] for segment in segments] == keywordTopics()
+    assert gemini.loadTopicCache() == {}
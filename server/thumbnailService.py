@@ -0,0 +1,122 @@
+import asyncio
+import io
+import os
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+
+from moviepy.config import FFMPEG_BINARY
+from PIL import Image
+import metrics
+
+# Configuration
+THUMBNAILS_FOLDER = "Output/thumbnails"
+THUMBNAIL_WORKERS = int(os.getenv("THUMBNAIL_WORKERS", "2"))
+
+# Variant name -> max width in pixels (None keeps the frame size)
+THUMBNAIL_WIDTHS = {"sm": 320, "md": 640, "full": None}
+THUMBNAIL_FORMATS = {
+    "jpg": ("JPEG", {"quality": 85}),
+    "webp": ("WEBP", {"quality": 80}),
+}
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+# ====================
+# Frame Extraction
+# ====================
+
+
+def extract_frame(video_path: str, timestamp: float = 0.0) -> Image.Image:
+    """Decode a single frame with ffmpeg, seeking before opening the input"""
+    result = subprocess.run(
+        [
+            FFMPEG_BINARY,
+            "-loglevel",
+            "error",
+            "-ss",
+            str(timestamp),
+            "-i",
+            video_path,
+            "-frames:v",
+            "1",
+            "-f",
+            "image2pipe",
+            "-vcodec",
+            "png",
+            "-",
+        ],
+        capture_output=True,
+        check=True,
+    )
+    if not result.stdout:
+        raise ValueError(f"No frame decoded from {video_path}")
+
+    image = Image.open(io.BytesIO(result.stdout))
+    return image.convert("RGB")
+
+
+def thumbnail_filename(project_id: str, variant: str, ext: str) -> str:
+    if variant == "full" and ext == "jpg":
+        # Name used before variants existed
+        return f"thumbnail_{project_id}.jpg"
+    return f"thumbnail_{project_id}_{variant}.{ext}"
+
+
+def generate_thumbnails(video_path: str, project_id: str) -> Dict[str, str]:
+    """
+    Write every size/format variant from one decoded frame.
+    Returns {"<variant>.<ext>": filename}.
+    """
+    with metrics.span("thumbnail"):
+        return _generate_thumbnails(video_path, project_id)
+
+
+def _generate_thumbnails(video_path: str, project_id: str) -> Dict[str, str]:
+    os.makedirs(THUMBNAILS_FOLDER, exist_ok=True)
+    frame = extract_frame(video_path)
+
+    variants = {}
+    for variant, width in THUMBNAIL_WIDTHS.items():
+        image = frame
+        if width and frame.width > width:
+            height = round(frame.height * width / frame.width)
+            image = frame.resize((width, height), Image.LANCZOS)
+
+        for ext, (image_format, options) in THUMBNAIL_FORMATS.items():
+            filename = thumbnail_filename(project_id, variant, ext)
+            path = os.path.join(THUMBNAILS_FOLDER, filename)
+            temp_path = f"{path}.tmp"
+            image.save(temp_path, image_format, **options)
+            os.replace(temp_path, path)
+            variants[f"{variant}.{ext}"] = filename
+
+    return variants
+
+
+# ====================
+# Worker Pool
+# ====================
+
+
+def get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=THUMBNAIL_WORKERS)
+    return _executor
+
+
+def shutdown_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+async def create_thumbnails(video_path: str, project_id: str) -> Dict[str, str]:
+    """Generate thumbnails in the worker pool without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_executor(), generate_thumbnails, video_path, project_id
+    )